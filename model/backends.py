@@ -0,0 +1,52 @@
+import model
+import vectorEngine
+from kernels import jit_available
+from parameters import default_parameters
+
+class Backend:
+    """Zone-level order generation and assignment functions with model.py's signatures"""
+
+    def __init__(self, name, generate_orders, assign_riders, overrides=None):
+        self.name = name
+        self.generate_orders = generate_orders
+        self.assign_riders = assign_riders
+        self.overrides = overrides or {}  # Parameter values the backend runs with
+
+    def parameters(self, params):
+        return {**params, **self.overrides} if self.overrides else params
+
+backends = {}
+
+def register_backend(backend):
+    backends[backend.name] = backend
+    return backend
+
+def default_backend():
+    """The production engine: jit when numba is installed, else the plain-Python reference"""
+    return "jit" if jit_available else "reference"
+
+def get_backend(name=None):
+    """Backend by name (None = default_backend()); Backend instances pass through"""
+    if isinstance(name, Backend):
+        return name
+    name = name or default_backend()
+    if name not in backends:
+        raise ValueError(f"Unknown backend: {name} (available: {', '.join(backends)})")
+    return backends[name]
+
+def resolve_backend(backend=None, params=None):
+    """(Backend, params with the backend's overrides applied); backend defaults to params["backend"]
+
+    Every entry point that runs a backend goes through this, so a backend
+    always runs with its own settings whichever stage calls it.
+    """
+    params = params or default_parameters
+    backend = get_backend(backend or params["backend"])
+    return backend, backend.parameters(params)
+
+# Today's object code in model.py in plain Python: the equivalence baseline the other backends are tested against
+register_backend(Backend("reference", model.generate_orders, model.assign_riders, {"use_jit": False}))
+# Whole-zone numpy draws; equal to the reference in distribution only
+register_backend(Backend("numpy", vectorEngine.generate_orders, vectorEngine.assign_riders))
+# Object code with the numba-compiled assignment loops always on (plain Python if numba is missing)
+register_backend(Backend("jit", model.generate_orders, model.assign_riders, {"use_jit": True}))
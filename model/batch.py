@@ -0,0 +1,161 @@
+import json
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from cityProfiles import city_metadata, use_city_registry
+from parameters import load_config_file, resolve_parameters
+from scenarios import compile_scenarios
+from interaction import run_simulation, summarize_city_results
+from tracing import pool_options
+
+# Job keys accepted from a job file (JSON, TOML or YAML) or the command line
+job_defaults = {
+    "cities": None,        # None = every city in the registry
+    "city_registry": None, # CSV/JSON city registry; None = cities.csv (or $CITY_REGISTRY)
+    "scenarios": ["bau"],  # Scenario names, or "peak_hours:evening_peak" for one slot
+    "time_slots": None,    # Slots for scenarios that define them; None = all of the scenario's slots
+    "seeds": [0],
+    "overrides": {},       # Dotted-path parameter overrides (see resolve_parameters)
+    "workers": None,       # None = one per CPU
+    "output": "-",         # .jsonl or .parquet path, "-" = JSON lines on stdout
+    "format": None,        # jsonl / parquet; None = from the output extension
+    "rollup": None         # Optional .csv/.parquet path for the national rollup
+}
+
+# Per-city KPIs that add up across cities
+rollup_sums = ["Total Orders", "Assigned Orders", "Unassigned Orders", "SLA <10 mins", "Fixed Riders",
+               "On-Demand Riders", "Partial Orders", "Stockout Orders"]
+
+def load_job(path=None, **settings):
+    """Job settings from a job file, with non-None keyword settings taking precedence"""
+    job = dict(job_defaults)
+    if path:
+        loaded = load_config_file(path)
+        unknown = set(loaded) - set(job_defaults)
+        if unknown:
+            raise ValueError(f"Unknown job settings: {sorted(unknown)}")
+        job.update(loaded)
+    job.update({key: value for key, value in settings.items() if value is not None})
+    return job
+
+def parse_seeds(values):
+    """Seeds from ints and "first-last" ranges, e.g. ["0-9", "42"]"""
+    seeds = []
+    for value in values:
+        if isinstance(value, str) and "-" in value.lstrip("-"):
+            first, last = value.split("-", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(value))
+    return seeds
+
+def expand_jobs(cities, scenarios, time_slots=None, seeds=(0,), params=None):
+    """Every (city, scenario, time slot, seed) run of the job matrix"""
+    table = compile_scenarios(params)
+    runs = []
+    for city_name in cities:
+        if city_name not in city_metadata:
+            raise ValueError(f"Unknown city: {city_name}")
+        for scenario in scenarios:
+            scenario_type, _, slot = scenario.partition(":")
+            table.scenario_id(scenario_type)
+            defined = table.definitions[scenario_type].get("time_slots") or {}
+            if slot:
+                slots = [slot]
+            elif defined:
+                slots = [s for s in (time_slots or defined) if s in defined]
+            else:
+                slots = [None]
+            for time_slot in slots:
+                if time_slot is not None and time_slot not in defined:
+                    raise ValueError(f"Unknown time slot for {scenario_type}: {time_slot}")
+                for seed in seeds:
+                    runs.append((city_name, scenario_type, time_slot, seed))
+    return runs
+
+def _run_job(task):
+    city_name, scenario_type, time_slot, seed, overrides = task
+    params = resolve_parameters(overrides)
+    random.seed(seed)
+    start = time.perf_counter()
+    results = run_simulation(city_name, scenario_type, time_slot, params)
+    row = {
+        "city": city_name,
+        "scenario": scenario_type,
+        "time_slot": time_slot,
+        "seed": seed,
+        **summarize_city_results(results),
+        "seconds": round(time.perf_counter() - start, 4)
+    }
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in row.items()}
+
+def _finished_runs(tasks, workers):
+    if workers == 1:
+        yield from map(_run_job, tasks)
+    else:
+        with Pool(processes=workers, **pool_options()) as pool:
+            yield from pool.imap_unordered(_run_job, tasks)
+
+def run_batch(job):
+    """Run a job matrix on a process pool and write one record per run; returns the records
+
+    JSON lines are written as runs finish, so a killed batch keeps what it
+    has done; Parquet is written once at the end.
+    """
+    if job["city_registry"]:
+        use_city_registry(job["city_registry"])
+    params = resolve_parameters(job["overrides"])
+    runs = expand_jobs(job["cities"] or list(city_metadata), job["scenarios"], job["time_slots"],
+                       parse_seeds(job["seeds"]), params)
+    tasks = [(*run, job["overrides"]) for run in runs]
+    output = job["output"]
+    output_format = job["format"] or ("parquet" if output.endswith(".parquet") else "jsonl")
+    if output_format not in ("jsonl", "parquet"):
+        raise ValueError(f"Unknown output format: {output_format}")
+    if output_format == "parquet" and output == "-":
+        raise ValueError("Parquet output needs a file path")
+
+    rows = []
+    stream = None
+    if output_format == "jsonl":
+        stream = sys.stdout if output == "-" else open(output, "w")
+    try:
+        for row in _finished_runs(tasks, job["workers"]):
+            rows.append(row)
+            if stream is not None:
+                stream.write(json.dumps(row) + "\n")
+                stream.flush()
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+
+    table = pd.DataFrame(rows)
+    if len(table):
+        table = table.sort_values(["city", "scenario", "time_slot", "seed"], kind="stable", na_position="first")
+        table = table.reset_index(drop=True)
+    if output_format == "parquet":
+        table.to_parquet(output, index=False)
+    if job["rollup"]:
+        rollup = national_rollup(table)
+        if job["rollup"].endswith(".parquet"):
+            rollup.to_parquet(job["rollup"])
+        else:
+            rollup.to_csv(job["rollup"])
+    return table
+
+def national_rollup(table):
+    """Sum every city's run into one row per (scenario, time slot, seed)"""
+    table = table.assign(time_slot=table["time_slot"].fillna(""),
+                         weighted_cost=table["Cost/Delivery"] * table["Assigned Orders"])
+    grouped = table.groupby(["scenario", "time_slot", "seed"])
+    rollup = grouped[rollup_sums].sum()
+    rollup.insert(0, "Cities", grouped.size())
+    rollup["Assignment Rate"] = (rollup["Assigned Orders"] / rollup["Total Orders"] * 100).fillna(0)
+    # Cost per delivery weighted by each city's assigned orders
+    rollup["Cost/Delivery"] = (grouped["weighted_cost"].sum() / rollup["Assigned Orders"]).fillna(0)
+    return rollup
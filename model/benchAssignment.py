@@ -0,0 +1,76 @@
+import random
+import time
+
+import numpy as np
+
+from interaction import run_simulation
+from kernels import assign_capacity, dispatch_intraday, jit_available
+from parameters import default_parameters
+
+def _best_of(function, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def delhi_zone_sizes(demand=10, seed=0):
+    """(orders, riders) per Delhi zone on an event sale day with demand x the orders
+
+    Only orders are scaled: each zone keeps the run's fleet (registry riders
+    plus on-demand top-up), as it would on a day with demand x the volume.
+    """
+    random.seed(seed)
+    results = run_simulation("Delhi", "event_sale")
+    riders = results["Fixed Riders"] + results["On-Demand Riders"]
+    return [(int(orders) * demand, int(count)) for orders, count in zip(results["Total Orders"], riders)]
+
+def benchmark_assignment(demand=10, repeats=5, seed=0):
+    """Time the assignment and intraday kernels with and without numba on Delhi at demand x orders"""
+    zones = delhi_zone_sizes(demand, seed)
+    rng = np.random.default_rng(seed)
+    workloads = [
+        (num_orders, num_riders, np.sort(rng.integers(0, 24 * 60, num_orders)), rng.integers(10, 60, num_orders))
+        for num_orders, num_riders in zones
+    ]
+    cap = default_parameters["max_orders_per_rider"]
+
+    def run(use_jit, intraday):
+        outputs = []
+        for num_orders, num_riders, arrivals, trips in workloads:
+            loads = np.zeros(num_riders, dtype=np.int64)
+            if intraday:
+                free_at = np.zeros(num_riders, dtype=np.int64)
+                outputs.append(dispatch_intraday(arrivals, trips, free_at, loads, cap, use_jit))
+            else:
+                outputs.append(assign_capacity(num_orders, loads, cap, use_jit))
+        return outputs
+
+    rows = []
+    for intraday in (False, True):
+        name = "intraday dispatch" if intraday else "capacity assignment"
+        python_time = _best_of(lambda: run(False, intraday), repeats)
+        row = {"kernel": name, "orders": sum(z[0] for z in zones), "riders": sum(z[1] for z in zones),
+               "python_s": python_time}
+        if jit_available:
+            run(True, intraday)  # Compile outside the timing
+            jit_time = _best_of(lambda: run(True, intraday), repeats)
+            # Same decisions either way (checked explicitly so python -O keeps it)
+            for (num_orders, num_riders, _, _), a, b in zip(workloads, run(False, intraday), run(True, intraday)):
+                a, b = (a, b) if intraday else ((a,), (b,))
+                if not all(np.array_equal(x, y) for x, y in zip(a, b)):
+                    raise RuntimeError(f"{name}: jit and Python kernels disagree on the zone with "
+                                       f"{num_orders} orders and {num_riders} riders")
+            row.update(jit_s=jit_time, speedup=python_time / jit_time)
+        rows.append(row)
+    return rows
+
+if __name__ == "__main__":
+    print(f"numba available: {jit_available}  (Delhi event sale, 10x orders, fleet not scaled)")
+    for row in benchmark_assignment():
+        line = (f"{row['kernel']:<20} {row['orders']:>7} orders {row['riders']:>5} riders  "
+                f"python {row['python_s'] * 1000:8.2f} ms")
+        if "jit_s" in row:
+            line += f"  jit {row['jit_s'] * 1000:7.2f} ms  ({row['speedup']:.0f}x)"
+        print(line)
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+
+from cityProfiles import city_metadata
+from parameters import resolve_parameters
+from scenarios import resolve_scenario
+from interaction import (
+    create_zones_from_city, get_scenario_multiplier, build_traffic_table, get_order_traffic_factors,
+    generate_city_orders, fulfil_city_orders, assign_city_orders, compute_city_kpis,
+    run_simulation, simulate_yearly_patterns
+)
+from inventory import DarkStoreInventory
+from kernels import assign_capacity
+from model import calculate_delivery_time
+from sweep import _load_model2
+from syntheticCity import SyntheticCity
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_history.json")
+
+# (zones, customers): synthetic cities from a single dark store up to a metro
+default_scales = [(1, 100), (10, 10_000), (100, 100_000), (1_000, 1_000_000), (10_000, 10_000_000)]
+
+def synthetic_city(num_zones, num_customers):
+    """Register a synthetic city of num_zones zones and return (city, params) to simulate it"""
+    city = SyntheticCity(f"Synthetic_{num_zones}z_{num_customers}c", num_zones, num_customers,
+                         density_sigma=0, riders_per_zone=3)
+    city.register()
+    return city, resolve_parameters()
+
+class StageTimer:
+    """Best-of timings and tracemalloc peaks per stage"""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.seconds = {}
+        self.peak_bytes = {}
+        self.items = {}
+
+    def time(self, stage, function, items=None):
+        if self.memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if self.memory:
+            # Peak allocated on top of what was live before the stage
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            self.peak_bytes[stage] = max(self.peak_bytes.get(stage, 0), peak)
+        else:
+            self.seconds[stage] = min(self.seconds.get(stage, float("inf")), elapsed)
+        if items is not None:
+            self.items[stage] = items(result) if callable(items) else items
+        return result
+
+def _stage_pass(timer, city_name, num_customers, scenario_type, params, seed, yearly):
+    random.seed(seed)
+    zones = timer.time("create_zones_from_city", lambda: create_zones_from_city(city_name, params),
+                       num_customers)
+    volume_multiplier = get_scenario_multiplier(scenario_type, params=params)
+    traffic = build_traffic_table(zones, params)
+    total_orders = timer.time(
+        "generate_orders",
+        lambda: generate_city_orders(zones, scenario_type, None, volume_multiplier, params),
+        num_customers
+    )
+    fulfil_city_orders(zones, DarkStoreInventory.from_params(len(zones), params), params)
+    traffic_factors = get_order_traffic_factors(zones, traffic, scenario_type, volume_multiplier)
+    base_delivery_time = city_metadata[city_name]["base_delivery_time"]
+    timer.time("assign_riders", lambda: assign_city_orders(
+        zones, scenario_type, None, traffic_factors, total_orders, base_delivery_time, params
+    ), total_orders)
+
+    scenario = resolve_scenario(scenario_type, params=params)
+    def delivery_times():
+        for _ in range(total_orders):
+            calculate_delivery_time(scenario, 1.2, base_delivery_time)
+    timer.time("calculate_delivery_time", delivery_times, total_orders)
+    timer.time("compute_kpis", lambda: compute_city_kpis(zones, total_orders, params), total_orders)
+    del zones, traffic_factors
+
+    timer.time("run_simulation", lambda: run_simulation(city_name, scenario_type, params=params),
+               num_customers)
+    if yearly:
+        with redirect_stdout(StringIO()):
+            timer.time("simulate_yearly_patterns",
+                       lambda: simulate_yearly_patterns(city_name, seed, params), 6 * num_customers)
+
+def _model2_pass(timer, num_zones, hours=16):
+    """model2's calculate_metrics loop over every hour of every dark store"""
+    model2 = _load_model2()
+    simulation = model2.FlipkartRiderSimulation(model2.city_metadata)
+    city_data = model2.city_metadata["Delhi"]
+    calls = num_zones * hours
+    def loop():
+        for i in range(calls):
+            simulation.calculate_metrics(100 + i % 900, city_data)
+    timer.time("model2.calculate_metrics", loop, calls)
+
+def benchmark_scale(num_zones, num_customers, scenario_type="event_sale", repeats=3, seed=0,
+                    memory=True, yearly_limit=10_000):
+    """Time every stage for one synthetic city size; returns one result row per stage"""
+    city, params = synthetic_city(num_zones, num_customers)
+    city_name = city.name
+    yearly = num_customers <= yearly_limit
+    timer = StageTimer()
+    try:
+        for _ in range(repeats):
+            _stage_pass(timer, city_name, num_customers, scenario_type, params, seed, yearly)
+            _model2_pass(timer, num_zones)
+        if memory:
+            timer.memory = True
+            tracemalloc.start()
+            try:
+                _stage_pass(timer, city_name, num_customers, scenario_type, params, seed, yearly)
+                _model2_pass(timer, num_zones)
+            finally:
+                tracemalloc.stop()
+    finally:
+        # A failing stage must not leave the synthetic city registered
+        city.unregister()
+    rows = []
+    for stage, seconds in timer.seconds.items():
+        items = timer.items.get(stage, 0)
+        rows.append({
+            "scale": f"{num_zones}z/{num_customers}c",
+            "zones": num_zones,
+            "customers": num_customers,
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "items": items,
+            # customers/s for world and order generation, orders/s (or calls/s) for the rest
+            "items_per_s": round(items / seconds, 1) if seconds > 0 else None,
+            "peak_mb": round(timer.peak_bytes[stage] / 1e6, 3) if stage in timer.peak_bytes else None
+        })
+    return rows
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(scales=None, max_customers=100_000, repeats=3, memory=True, history_path=HISTORY_PATH):
+    """Benchmark every scale up to max_customers and append the run to the JSON history"""
+    scales = [s for s in (scales or default_scales) if s[1] <= max_customers]
+    # Compile (or load) the numba kernels before anything is timed
+    assign_capacity(1, np.zeros(1, dtype=np.int64), 1)
+    rows = []
+    for num_zones, num_customers in scales:
+        rows.extend(benchmark_scale(num_zones, num_customers, repeats=repeats, memory=memory))
+    run = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": rows
+    }
+    if history_path:
+        history = load_history(history_path)
+        history.append(run)
+        with open(history_path, "w") as f:
+            json.dump(history, f, indent=1)
+    return run
+
+def load_history(history_path=HISTORY_PATH):
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path) as f:
+        return json.load(f)
+
+def compare_runs(baseline, current, threshold=1.10):
+    """(scale, stage, baseline s, current s, ratio, regression) for stages present in both runs"""
+    before = {(r["scale"], r["stage"]): r["seconds"] for r in baseline["results"]}
+    comparison = []
+    for row in current["results"]:
+        key = (row["scale"], row["stage"])
+        if key in before and before[key] > 0:
+            ratio = row["seconds"] / before[key]
+            comparison.append((*key, before[key], row["seconds"], round(ratio, 3), ratio > threshold))
+    return comparison
+
+def print_run(run):
+    print(f"commit {run['commit']}  {run['timestamp']}  python {run['python']}")
+    print(f"{'Scale':<18} {'Stage':<26} {'Seconds':>10} {'Items/s':>14} {'Peak MB':>9}")
+    for row in run["results"]:
+        peak = f"{row['peak_mb']:>9.2f}" if row["peak_mb"] is not None else f"{'-':>9}"
+        print(f"{row['scale']:<18} {row['stage']:<26} {row['seconds']:>10.4f} {row['items_per_s']:>14,.0f} {peak}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every simulation stage at several city sizes")
+    parser.add_argument("--max-customers", type=int, default=100_000,
+                        help="largest scale to run (10000000 runs the full suite)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON history file ('' to skip saving)")
+    parser.add_argument("--compare", action="store_true", help="compare with the previous run in the history")
+    args = parser.parse_args()
+
+    history = load_history(args.history) if args.history else []
+    run = run_suite(max_customers=args.max_customers, repeats=args.repeats,
+                    memory=not args.no_memory, history_path=args.history)
+    print_run(run)
+    if args.compare and history:
+        print(f"\nvs {history[-1]['commit']} ({history[-1]['timestamp']}):")
+        for scale, stage, before, after, ratio, regression in compare_runs(history[-1], run):
+            flag = "  REGRESSION" if regression else ""
+            print(f"{scale:<18} {stage:<26} {before:>9.4f} -> {after:>9.4f}  x{ratio:.2f}{flag}")
@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+import numpy as np
+
+from parameters import default_parameters
+from ragged import Ragged
+
+def popularity_weights(num_skus, popularity="zipf", exponent=1.0):
+    """Unnormalised popularity per SKU (SKU 0 is the most popular)"""
+    ranks = np.arange(1, num_skus + 1, dtype=float)
+    if popularity == "zipf":
+        return ranks ** -exponent
+    if popularity == "uniform":
+        return np.ones(num_skus)
+    raise ValueError(f"Unknown popularity distribution: {popularity}")
+
+def build_alias_table(weights):
+    """Vose's alias method: (prob, alias) arrays for O(1) sampling"""
+    n = len(weights)
+    scaled = np.asarray(weights, dtype=float) * n / np.sum(weights)
+    prob = np.ones(n)
+    alias = np.arange(n, dtype=np.int32)
+    scaled_list = scaled.tolist()
+    small = [i for i, p in enumerate(scaled_list) if p < 1.0]
+    large = [i for i, p in enumerate(scaled_list) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled_list[s]
+        alias[s] = l
+        scaled_list[l] = scaled_list[l] + scaled_list[s] - 1.0
+        if scaled_list[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    # Whatever is left is 1.0 up to rounding error
+    return prob, alias
+
+class SkuCatalog:
+    """Integer SKU catalog with a popularity distribution and alias-method sampling"""
+
+    def __init__(self, num_skus, popularity="zipf", exponent=1.0):
+        self.num_skus = num_skus
+        self.popularity = popularity
+        weights = popularity_weights(num_skus, popularity, exponent)
+        self.probabilities = weights / weights.sum()
+        self.prob, self.alias = build_alias_table(weights)
+
+    def __len__(self):
+        return self.num_skus
+
+    def sample(self, size, rng):
+        """Draw size SKU ids (int32) in O(1) each, independent of catalog size"""
+        columns = rng.integers(0, self.num_skus, size=size)
+        accept = rng.random(size) < self.prob[columns]
+        return np.where(accept, columns, self.alias[columns]).astype(np.int32)
+
+    def pick(self, column_uniforms, accept_uniforms):
+        """SKU ids from pre-drawn uniforms, two per SKU (see streams.KeyedUniforms)"""
+        columns = np.minimum((column_uniforms * self.num_skus).astype(np.int64), self.num_skus - 1)
+        accept = accept_uniforms < self.prob[columns]
+        return np.where(accept, columns, self.alias[columns]).astype(np.int32)
+
+    def sample_distinct(self, lengths, rng):
+        """Ragged rows of lengths[i] distinct SKUs each (e.g. wishlists), drawn by popularity
+
+        Rows that come out with a repeated SKU are redrawn whole until none
+        does, so every draw stays an O(1) alias lookup. Rows longer than half
+        the catalog, and rows still repeating after max_redraw_rounds, are
+        drawn without replacement instead (see weighted_without_replacement).
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if len(lengths) and lengths.max() > self.num_skus:
+            raise ValueError(f"Cannot draw {lengths.max()} distinct SKUs from a catalog of {self.num_skus}")
+        rows = Ragged.from_lengths(lengths, np.empty(int(lengths.sum()), dtype=np.int32))
+        # Long rows would repeat a SKU on almost every draw
+        without_replacement = 2 * lengths > self.num_skus
+        redraw = np.flatnonzero(~without_replacement)
+        for _ in range(max_redraw_rounds):
+            if not len(redraw):
+                break
+            index = rows.value_index(redraw)
+            rows.values[index] = self.sample(len(index), rng)
+            redraw = redraw[Ragged.from_lengths(lengths[redraw], rows.values[index]).duplicate_rows()]
+        without_replacement[redraw] = True
+        keyed = np.flatnonzero(without_replacement)
+        if len(keyed):
+            rows.values[rows.value_index(keyed)] = self.weighted_without_replacement(lengths[keyed], rng)
+        return rows
+
+    def weighted_without_replacement(self, lengths, rng):
+        """Flat rows of lengths[i] distinct SKUs by Efraimidis-Spirakis keys
+
+        Each row ranks every SKU by Exp(1) / popularity and keeps the lowest
+        lengths[i], i.e. popularity-weighted draws without replacement; costs
+        one key per SKU per row.
+        """
+        keys = rng.standard_exponential((len(lengths), self.num_skus)) / self.probabilities
+        order = np.argsort(keys, axis=1)
+        return order[np.arange(self.num_skus) < lengths[:, None]].astype(np.int32)
+
+# Whole-row redraws sample_distinct tries before drawing a row without replacement
+max_redraw_rounds = 32
+
+@lru_cache(maxsize=8)
+def _cached_catalog(num_skus, popularity, exponent):
+    return SkuCatalog(num_skus, popularity, exponent)
+
+def get_catalog(params=None):
+    """The (cached) catalog described by the simulation parameters"""
+    params = params or default_parameters
+    return _cached_catalog(params["catalog_size"], params["catalog_popularity"],
+                           params["catalog_zipf_exponent"])
+
+def numpy_rng(rng):
+    """numpy Generator seeded from a random.Random-like stream, so seeds stay reproducible"""
+    return np.random.default_rng(rng.getrandbits(64))
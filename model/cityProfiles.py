@@ -1,20 +1,139 @@
+import csv
+import json
+import math
+import os
+
+from dataGen import estimate_zone_count
 
 dark_store_radius_km = 3
 dark_store_area = 3.14 * (dark_store_radius_km ** 2)
 
-city_metadata = {
-    "Delhi": {
-        "avg_zone_size": dark_store_area,
-        "base_delivery_time": 8,
-        #super density zone area of Delhi in sq Km. >20,000 people/sq km
-        "area_sq_km": 141,
-        "total_riders": 75
-    },
-    "Pune": {
-        "avg_zone_size": dark_store_area,
-        "base_delivery_time": 10,
-        #super density zone area of Pune in sq Km. >20,000 people/sq km
-        "area_sq_km": 10,
-        "total_riders": 30,
-    }
+# City profiles live in a registry file (CSV or JSON) shared by model and
+# model2. Areas are the super density zones (>20,000 people/sq km) in sq km;
+# riders is the city's fixed fleet; the *_order_per_hour_* rates drive model2.
+default_registry_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.csv")
+
+order_rate_columns = [f"{scenario}_order_per_hour_{period}"
+                      for scenario in ["BAU", "peakday", "monthpeak", "yearpeak"]
+                      for period in ["peak", "non_peak"]]
+
+# column -> (type, required, lowest allowed integer); numbers must be positive
+registry_columns = {
+    "area_sq_km": (float, True, None),
+    "avg_zone_size": (float, False, None),
+    "base_delivery_time": (float, True, None),
+    "riders": (int, True, 0),
+    "dark_stores": (int, True, 1),
+    "traffic_factor": (float, True, None),
+    **{column: (int, True, 0) for column in order_rate_columns}
 }
+
+def _parse_value(value, kind):
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError
+    if kind is int:
+        if not number.is_integer():
+            raise ValueError
+        return int(number)
+    return int(number) if number.is_integer() else number
+
+def validate_city_registry(rows, source="registry"):
+    """Typed, validated {city: profile} from raw rows; every problem is reported at once"""
+    cities = {}
+    errors = []
+    for line, row in enumerate(rows, 1):
+        name = str(row.get("city") or "").strip()
+        where = f"{source} row {line}" + (f" ({name})" if name else "")
+        if not name:
+            errors.append(f"{where}: missing city name")
+            continue
+        if name in cities:
+            errors.append(f"{where}: duplicate city")
+            continue
+        unknown = set(row) - set(registry_columns) - {"city"}
+        if unknown:
+            errors.append(f"{where}: unknown columns {sorted(unknown)}")
+        profile = {}
+        for column, (kind, required, minimum) in registry_columns.items():
+            try:
+                value = _parse_value(row.get(column, ""), kind)
+            except (TypeError, ValueError):
+                errors.append(f"{where}: {column} must be {'an integer' if kind is int else 'a finite number'}")
+                continue
+            if value is None:
+                if required:
+                    errors.append(f"{where}: missing {column}")
+                continue
+            if kind is float and value <= 0:
+                errors.append(f"{where}: {column} must be > 0")
+                continue
+            if kind is int and value < minimum:
+                errors.append(f"{where}: {column} must be >= {minimum}")
+                continue
+            profile[column] = value
+        if "riders" in profile and "area_sq_km" in profile:
+            # Every zone starts with at least one fixed rider
+            zones = estimate_zone_count(profile["area_sq_km"], profile.get("avg_zone_size", dark_store_area))
+            if profile["riders"] < zones:
+                errors.append(f"{where}: riders ({profile['riders']}) must be at least the zone count ({zones})")
+        cities[name] = profile
+    if errors:
+        raise ValueError("Invalid city registry:\n  " + "\n  ".join(errors))
+    if not cities:
+        raise ValueError(f"City registry {source} is empty")
+    return cities
+
+def load_city_registry(path=None):
+    """City profiles from a CSV file or a JSON list of records / {city: profile} object"""
+    path = path or os.environ.get("CITY_REGISTRY") or default_registry_path
+    if path.endswith(".json"):
+        with open(path) as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = [{"city": name, **profile} for name, profile in rows.items()]
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+    return validate_city_registry(rows, os.path.basename(path))
+
+def model_city_metadata(registry):
+    """model's view of the registry, with the zone count worked out once per city"""
+    metadata = {}
+    for name, profile in registry.items():
+        avg_zone_size = profile.get("avg_zone_size", dark_store_area)
+        metadata[name] = {
+            "avg_zone_size": avg_zone_size,
+            "base_delivery_time": profile["base_delivery_time"],
+            "area_sq_km": profile["area_sq_km"],
+            "total_riders": profile["riders"],
+            "zones": estimate_zone_count(profile["area_sq_km"], avg_zone_size)
+        }
+    return metadata
+
+def model2_city_metadata(registry):
+    """model2's view of the registry: fleet, dark stores, traffic and hourly order rates"""
+    return {
+        name: {
+            "area_sq_km": profile["area_sq_km"],
+            "fixed_riders": profile["riders"],
+            "dark_stores": profile["dark_stores"],
+            "traffic_factor": profile["traffic_factor"],
+            **{column: profile[column] for column in order_rate_columns}
+        }
+        for name, profile in registry.items()
+    }
+
+city_metadata = model_city_metadata(load_city_registry())
+
+def use_city_registry(path):
+    """Swap in another registry file for this process and the worker processes it starts"""
+    os.environ["CITY_REGISTRY"] = os.path.abspath(path)
+    metadata = model_city_metadata(load_city_registry(path))
+    city_metadata.clear()
+    city_metadata.update(metadata)
+    return city_metadata
@@ -1,20 +1,35 @@
 class Customer:
-    def __init__(self, id, zone, has_wallet, wishlist_items):
+    def __init__(self, id, zone, has_wallet, wishlists, index):
         self.id = id
         self.zone = zone
         self.has_wallet = has_wallet
-        self.wishlist_items = wishlist_items
+        self.wishlists = wishlists  # Zone-wide Ragged wishlist rows (see ragged.py)
+        self.index = index  # This customer's row in wishlists
         self.cart = []
 
+    @property
+    def wishlist_items(self):
+        return self.wishlists.row(self.index)
+
+    @property
+    def wishlist_size(self):
+        return int(self.wishlists.offsets[self.index + 1] - self.wishlists.offsets[self.index])
+
 class Order:
-    def __init__(self, customer, items, scheduled, timestamp):
+    def __init__(self, customer, scheduled, timestamp, basket=None, index=0):
         self.customer = customer
-        self.items = items
+        self.basket = basket  # Zone-wide Ragged basket rows, filled in by generate_orders
+        self.index = index  # This order's row in basket
         self.scheduled = scheduled
         self.timestamp = timestamp
         self.delivery_time = None
+        self.delivery_minutes = None
         self.assigned_rider = None
 
+    @property
+    def items(self):
+        return self.basket.row(self.index) if self.basket is not None else []
+
 class Rider:
     def __init__(self, id, zone, rider_type="fixed"):
         self.id = id
@@ -26,7 +41,14 @@ class Rider:
 class Zone:
     def __init__(self, name):
         self.name = name
+        self.traffic_level = "moderate"
         self.customers = []
+        self.wishlists = None  # Ragged wishlist rows, one per customer
         self.riders = []
         self.orders = []
-        self.unassigned_orders = []
\ No newline at end of file
+        self.unassigned_orders = []
+        self.fulfilled_items = None  # Items filled from dark store stock, per order
+        self.customer_xy = None  # Customer coordinates in km from the dark store (distance delivery)
+        self.order_travel_minutes = None  # Free-flow ride minutes per order (see geometry.py)
+        self.road_grid = None  # RoadGridTable and this zone's street grid variant (see roadGrid.py)
+        self.road_grid_variant = 0
\ No newline at end of file
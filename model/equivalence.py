@@ -0,0 +1,79 @@
+import random
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from interaction import run_simulation, summarize_city_results
+from tracing import pool_options
+
+equivalence_metrics = ["Total Orders", "Assigned Orders", "SLA <10 mins", "Cost/Delivery"]
+
+def ks_statistic(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic: largest gap between the empirical CDFs"""
+    a, b = np.sort(np.asarray(a, dtype=float)), np.sort(np.asarray(b, dtype=float))
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side="right") / len(a)
+    cdf_b = np.searchsorted(b, values, side="right") / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+def ks_pvalue(statistic, n, m):
+    """Asymptotic two-sample KS p-value (Kolmogorov distribution, Stephens' correction)
+
+    Conservative for integer-valued KPIs, where ties make large gaps less likely.
+    """
+    effective = np.sqrt(n * m / (n + m))
+    lam = (effective + 0.12 + 0.11 / effective) * statistic
+    if lam < 1e-3:
+        return 1.0
+    k = np.arange(1, 101)
+    p = 2 * np.sum((-1.0) ** (k - 1) * np.exp(-2 * k ** 2 * lam ** 2))
+    return float(min(max(p, 0.0), 1.0))
+
+def _run_seed(task):
+    backend, city, scenario_type, time_slot, seed = task
+    random.seed(seed)
+    results = run_simulation(city, scenario_type, time_slot, backend=backend)
+    return {"backend": backend, "seed": seed, **summarize_city_results(results)}
+
+def backend_samples(backends, city, scenario_type, time_slot=None, seeds=range(200), workers=None):
+    """City summary KPIs of every backend for every seed, one row per run"""
+    tasks = [(backend, city, scenario_type, time_slot, seed) for backend in backends for seed in seeds]
+    if workers == 1:
+        rows = [_run_seed(task) for task in tasks]
+    else:
+        with Pool(workers, **pool_options()) as pool:
+            rows = list(pool.imap_unordered(_run_seed, tasks, chunksize=8))
+    return pd.DataFrame(rows).sort_values(["backend", "seed"]).reset_index(drop=True)
+
+def equivalence_report(city, scenario_type, time_slot=None, backends=("numpy", "jit"), seeds=range(200),
+                       metrics=None, alpha=0.01, workers=None):
+    """KS test of each backend's KPI distribution against the reference backend
+
+    One row per (backend, metric) with both means, the KS statistic and
+    p-value; "Equivalent" is False when the test rejects at alpha.
+    """
+    metrics = metrics or equivalence_metrics
+    samples = backend_samples(["reference", *backends], city, scenario_type, time_slot, seeds, workers)
+    reference = samples[samples["backend"] == "reference"]
+    rows = []
+    for backend in backends:
+        candidate = samples[samples["backend"] == backend]
+        for metric in metrics:
+            statistic = ks_statistic(reference[metric], candidate[metric])
+            p_value = ks_pvalue(statistic, len(reference), len(candidate))
+            rows.append({
+                "Backend": backend,
+                "Metric": metric,
+                "Reference Mean": reference[metric].mean(),
+                "Backend Mean": candidate[metric].mean(),
+                "KS Statistic": round(statistic, 4),
+                "p-value": round(p_value, 4),
+                "Equivalent": p_value >= alpha
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    for scenario_type in ["bau", "event_sale", "peak_hour_event"]:
+        print(f"\n{scenario_type}")
+        print(equivalence_report("Delhi", scenario_type).to_string(index=False))
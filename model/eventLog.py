@@ -0,0 +1,166 @@
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from parameters import default_parameters
+import metrics
+
+# String columns are dictionary-encoded while buffering: ids repeat across
+# runs, and converting millions of distinct Python str objects is what made
+# the writer expensive. Each record batch gets its own dictionaries (Parquet
+# stores one per row group), so a flush costs O(batch), not O(ids so far).
+encoded_columns = ["run", "city", "scenario", "zone", "customer", "rider"]
+
+def _schema():
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("run", text),
+        ("city", text),
+        ("scenario", text),
+        ("order_id", pa.int64()),
+        ("zone", text),
+        ("customer", text),
+        ("items_count", pa.int16()),
+        ("scheduled", pa.bool_()),
+        ("arrival_minute", pa.int32()),
+        ("rider", text),
+        ("delivery_minute", pa.int32()),
+        ("sla_hit", pa.bool_())
+    ])
+
+class OrderEventLog:
+    """Chunked order-level event log written as Parquet or Arrow IPC record batches
+
+    Orders are appended zone by zone into column buffers; every chunk_size rows
+    the buffers become one record batch (a Parquet row group / IPC batch), so
+    memory stays bounded no matter how many orders a run produces.
+
+        with OrderEventLog("orders.parquet") as log:
+            run_simulation("Delhi", "event_sale", event_log=log)
+    """
+
+    columns = ["run", "city", "scenario", "order_id", "zone", "customer", "items_count",
+               "scheduled", "arrival_minute", "rider", "delivery_minute", "sla_hit"]
+
+    def __init__(self, path, chunk_size=65536, file_format=None, params=None):
+        if pa is None:
+            raise ImportError("pyarrow is required for the order event log (pip install pyarrow)")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.file_format = file_format or ("parquet" if path.endswith(".parquet") else "arrow")
+        self.sla_minutes = (params or default_parameters)["sla_minutes"]
+        self.schema = _schema()
+        self.writer = None
+        self.next_order_id = 0
+        self.run = ""  # Label stored with each order, e.g. the simulated date or replication
+        self.rows_written = 0
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self.buffers = {column: [] for column in self.columns}
+        self.dictionaries = {column: {} for column in encoded_columns}
+        self.buffered = 0
+
+    def log_zones(self, zones, city_name, scenario_type, run=None):
+        """Append every order of the given zones (after assignment)"""
+        run = str(self.run if run is None else run)
+        for zone in zones:
+            orders = zone.orders
+            count = len(orders)
+            if count == 0:
+                continue
+            # Codes index the current batch's dictionaries, which flush() starts afresh
+            codes = self.dictionaries
+            run_code = codes["run"].setdefault(run, len(codes["run"]))
+            city_code = codes["city"].setdefault(city_name, len(codes["city"]))
+            scenario_code = codes["scenario"].setdefault(scenario_type, len(codes["scenario"]))
+            customer_codes = codes["customer"]
+            rider_codes = codes["rider"]
+            # One pass over the orders, then transpose into the column buffers
+            customers, items, scheduled, timestamps, riders, durations = zip(*[
+                (o.customer.id, len(o.items), o.scheduled, o.timestamp, o.assigned_rider, o.delivery_minutes)
+                for o in orders
+            ])
+            arrivals = [t.hour * 60 + t.minute for t in timestamps]
+            buffers = self.buffers
+            buffers["run"].extend([run_code] * count)
+            buffers["city"].extend([city_code] * count)
+            buffers["scenario"].extend([scenario_code] * count)
+            buffers["order_id"].extend(range(self.next_order_id, self.next_order_id + count))
+            buffers["zone"].extend([codes["zone"].setdefault(zone.name, len(codes["zone"]))] * count)
+            buffers["customer"].extend([customer_codes.setdefault(c, len(customer_codes)) for c in customers])
+            buffers["items_count"].extend(items)
+            buffers["scheduled"].extend(scheduled)
+            buffers["arrival_minute"].extend(arrivals)
+            buffers["rider"].extend([rider_codes.setdefault(r, len(rider_codes)) if r is not None else None
+                                     for r in riders])
+            buffers["delivery_minute"].extend(
+                [a + d if d is not None else None for a, d in zip(arrivals, durations)]
+            )
+            sla = self.sla_minutes
+            buffers["sla_hit"].extend([d is not None and d <= sla for d in durations])
+            self.next_order_id += count
+            self.buffered += count
+            metrics.events_processed.inc(count)
+            if self.buffered >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write buffered rows as one record batch"""
+        if self.buffered == 0:
+            return
+        arrays = []
+        for field in self.schema:
+            values = self.buffers[field.name]
+            if field.name in self.dictionaries:
+                dictionary = pa.array(list(self.dictionaries[field.name]), type=pa.string())
+                array = pa.DictionaryArray.from_arrays(pa.array(values, type=pa.int32()), dictionary)
+                if self.file_format != "parquet":
+                    # IPC files can't replace dictionaries between batches
+                    array = array.dictionary_decode()
+                arrays.append(array)
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self._file_schema())
+        self._open_writer()
+        self.writer.write_batch(batch)
+        self.rows_written += self.buffered
+        self._reset_buffers()
+
+    def _file_schema(self):
+        if self.file_format == "parquet":
+            return self.schema
+        return pa.schema([
+            pa.field(f.name, pa.string()) if f.name in self.dictionaries else f for f in self.schema
+        ])
+
+    def _open_writer(self):
+        if self.writer is None:
+            if self.file_format == "parquet":
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = ipc.new_file(self.path, self._file_schema())
+
+    def close(self):
+        self.flush()
+        # Still leave a valid, empty file behind when nothing was logged
+        self._open_writer()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_event_log(path):
+    """Load an event log written by OrderEventLog into a DataFrame"""
+    if pa is None:
+        raise ImportError("pyarrow is required for the order event log (pip install pyarrow)")
+    if path.endswith(".parquet"):
+        return pq.read_table(path).to_pandas()
+    with pa.memory_map(path) as source:
+        return ipc.open_file(source).read_all().to_pandas()
@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+
+from parameters import default_parameters
+
+# Zones are discs around their dark store (at the origin); customer
+# coordinates are in km. Travel is precomputed per order as free-flow ride
+# minutes, so delivery times are one array expression per zone.
+
+delivery_models = ("jitter", "distance", "road_grid")
+
+def zone_radius_km(avg_zone_size):
+    """Radius of a circular zone of avg_zone_size sq km"""
+    return math.sqrt(avg_zone_size / math.pi)
+
+def place_customers(zones, radius_km, rng):
+    """Uniform coordinates in every zone's disc, drawn for the whole city at once"""
+    sizes = [len(zone.customers) for zone in zones]
+    count = sum(sizes)
+    # sqrt keeps the density uniform over the disc's area
+    r = radius_km * np.sqrt(rng.random(count))
+    theta = 2 * np.pi * rng.random(count)
+    xy = np.column_stack([r * np.cos(theta), r * np.sin(theta)])
+    for zone, block in zip(zones, np.split(xy, np.cumsum(sizes)[:-1])):
+        zone.customer_xy = block
+
+def order_customers(zones):
+    """City-wide customer rows of every order (offset into the concatenated zones) and per-zone order counts"""
+    counts = [len(zone.orders) for zone in zones]
+    customer_offsets = np.cumsum([0] + [len(zone.customers) for zone in zones])
+    rows = np.fromiter((customer_offsets[z] + order.customer.index
+                        for z, zone in enumerate(zones) for order in zone.orders),
+                       dtype=np.int64, count=sum(counts))
+    return rows, counts
+
+def locate_city_orders(zones, params=None):
+    """Free-flow ride minutes of every order of the city (zone.order_travel_minutes)
+
+    One gather and one hypot (or road grid table lookup) over all orders of
+    the city-day; a no-op for the jitter delivery model.
+    """
+    params = params or default_parameters
+    if params["delivery_model"] not in delivery_models:
+        raise ValueError(f"Unknown delivery model: {params['delivery_model']}")
+    if params["delivery_model"] == "jitter":
+        return
+    rows, counts = order_customers(zones)
+    xy = np.concatenate([zone.customer_xy for zone in zones])[rows]
+    if params["delivery_model"] == "road_grid":
+        # One cell lookup per order in the zone's precomputed shortest-path table
+        variants = np.repeat([zone.road_grid_variant for zone in zones], counts)
+        minutes = zones[0].road_grid.lookup(variants, xy)
+    else:
+        km = np.hypot(xy[:, 0], xy[:, 1]) * params["road_circuity"]
+        minutes = km / params["rider_speed_kmph"] * 60
+    for zone, block in zip(zones, np.split(minutes, np.cumsum(counts)[:-1])):
+        zone.order_travel_minutes = block
+
+def travel_delivery_times(scenario, traffic_factors, travel_minutes, params=None):
+    """Delivery minutes from precomputed ride minutes: (handling + ride x traffic) x scenario multiplier"""
+    params = params or default_parameters
+    ride = np.asarray(travel_minutes) * np.asarray(traffic_factors, dtype=float)
+    minutes = (params["handling_minutes"] + ride) * scenario.delivery_multiplier
+    return np.ceil(minutes).astype(np.int64)
@@ -0,0 +1,99 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+from tracing import span
+
+class PhaseRecord:
+    """Measurements for one phase of a run"""
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.allocated_bytes = None  # Net bytes still allocated when the phase ended
+        self.peak_bytes = None  # Peak allocation above the phase's starting point
+        self.items = None
+
+    def to_dict(self):
+        return {
+            "phase": self.name,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "allocated_bytes": self.allocated_bytes,
+            "peak_bytes": self.peak_bytes,
+            "items": self.items
+        }
+
+class RunProfile:
+    """Opt-in per-phase wall time, CPU time, tracemalloc allocations and item counts
+
+        profile = RunProfile("Delhi event_sale")
+        results = run_simulation("Delhi", "event_sale", profile=profile)
+        print(profile.to_frame())
+        profile.write_json("profile.json")
+
+    Memory tracing slows the run down; pass trace_memory=False for timings only.
+    """
+
+    def __init__(self, label="", trace_memory=True):
+        self.label = label
+        self.trace_memory = trace_memory
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name, items=None):
+        record = PhaseRecord(name)
+        record.items = items
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            with span(name):
+                yield record
+        finally:
+            record.wall_s = time.perf_counter() - wall
+            record.cpu_s = time.process_time() - cpu
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record.allocated_bytes = current - baseline
+                record.peak_bytes = peak - baseline
+                if started_tracing:
+                    tracemalloc.stop()
+            self.phases.append(record)
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "wall_s": round(sum(p.wall_s for p in self.phases), 6),
+            "cpu_s": round(sum(p.cpu_s for p in self.phases), 6),
+            "phases": [p.to_dict() for p in self.phases]
+        }
+
+    def to_frame(self):
+        return pd.DataFrame([p.to_dict() for p in self.phases]).set_index("phase")
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+class NullProfile:
+    """Stand-in used when no profile is requested: phases are only trace spans"""
+
+    class _Record:
+        items = None
+
+    @contextmanager
+    def phase(self, name, items=None):
+        with span(name):
+            yield self._Record()
+
+null_profile = NullProfile()
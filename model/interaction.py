@@ -1,36 +1,78 @@
 import pandas as pd
 import random
-from model import generate_orders, assign_riders, compute_kpis
+from model import compute_kpis
 from definitions import Zone, Customer, Rider
 from cityProfiles import city_metadata
-from dataGen import estimate_zone_count, generate_zones, distribute_riders_across_zones
+from dataGen import generate_zones, distribute_riders_across_zones
+from parameters import default_parameters
+from streams import RandomStreams, stream_for
+from sketches import TDigest
+from catalog import get_catalog, numpy_rng
+from inventory import DarkStoreInventory
+from traffic import TrafficTable
+from scenarios import resolve_scenario
+from backends import resolve_backend
+from instrumentation import null_profile
+from tracing import span
+from geometry import zone_radius_km, place_customers, locate_city_orders
+from roadGrid import attach_road_grids
+import metrics
 
-def create_zones_from_city(city_name):
+def create_zones_from_city(city_name, params=None, rng=random):
     """Generate zones based on city metadata"""
+    params = params or default_parameters
     if city_name not in city_metadata:
         raise ValueError(f"City {city_name} not found in metadata")
     
     metadata = city_metadata[city_name]
-    num_zones = estimate_zone_count(metadata["area_sq_km"], metadata["avg_zone_size"])
-    zone_data = generate_zones(num_zones)
+    if "synthetic" in metadata:
+        # Synthetic cities (syntheticCity.py) carry their own zone table
+        zones = metadata["synthetic"].create_zones(params, rng)
+    else:
+        zones = _registry_zones(metadata, params, rng)
+    
+    # Customer coordinates are only drawn when delivery times use them, so
+    # jitter runs keep their random sequence
+    if params["delivery_model"] != "jitter":
+        radius_km = zone_radius_km(metadata["avg_zone_size"])
+        place_customers(zones, radius_km, numpy_rng(rng))
+        if params["delivery_model"] == "road_grid":
+            attach_road_grids(zones, radius_km, params)
+    return zones
+
+def _registry_zones(metadata, params, rng):
+    num_zones = metadata["zones"]
+    zone_data = generate_zones(num_zones, rng, params["customers_per_zone"])
     
     # Fixed riders per city (distributed across zones)
-    fixed_riders_per_city = 15
-    riders_distribution = distribute_riders_across_zones(fixed_riders_per_city, num_zones)
+    fixed_riders_per_city = params["fixed_riders_per_city"]
+    if fixed_riders_per_city is None:
+        fixed_riders_per_city = metadata["total_riders"]
+    riders_distribution = distribute_riders_across_zones(fixed_riders_per_city, num_zones, rng)
+    
+    catalog = get_catalog(params)
     
     zones = []
     for i, (zone_name, details) in enumerate(zone_data.items()):
         zone = Zone(zone_name)
+        zone.traffic_level = details["traffic_level"]
         
-        # Create customers
+        # Wallet flags and wishlist sizes (1-5 items) per customer, then every
+        # wishlist of the zone (distinct SKUs per customer) drawn at once as CSR rows
+        wallets = []
+        wishlist_sizes = []
         for j in range(details["num_customers"]):
-            customer = Customer(
-                id=f"{zone_name}_C{j}", 
-                zone=zone_name, 
-                has_wallet=random.choice([True, False]), 
-                wishlist_items=[f"item_{k}" for k in range(1, random.randint(2, 6))]
-            )
-            zone.customers.append(customer)
+            wallets.append(rng.choice([True, False]))
+            # A wishlist can't hold more distinct SKUs than the catalog has
+            wishlist_sizes.append(min(rng.randint(2, 6) - 1, len(catalog)))
+        zone.wishlists = catalog.sample_distinct(wishlist_sizes, numpy_rng(rng))
+        
+        # Create customers
+        zone.customers = [
+            Customer(id=f"{zone_name}_C{j}", zone=zone_name, has_wallet=has_wallet,
+                     wishlists=zone.wishlists, index=j)
+            for j, has_wallet in enumerate(wallets)
+        ]
         
         # Create fixed riders using distributed count
         num_riders_for_zone = riders_distribution[i]
@@ -42,96 +84,173 @@ def create_zones_from_city(city_name):
     
     return zones
 
-def get_scenario_multiplier(scenario_type, time_slot=None):
-    """Get volume multiplier based on scenario type"""
-    multipliers = {
-        "bau": 1.0,  # Business As Usual
-        "peak_hours": 1.08,  # 8% higher than average
-        "peak_days": 1.22,   # 22% higher than BAU
-        "event_sale": 1.45,  # 45% higher than BAU
-        "peak_hour_event": 3.0  # 200% higher (300% of BAU)
-    }
-    
-    # For peak hours, check if it's morning or evening peak
-    if scenario_type == "peak_hours" and time_slot:
-        if time_slot in ["morning_peak", "evening_peak"]:
-            return multipliers["peak_hours"]
-        else:
-            return multipliers["bau"]
+def get_scenario_multiplier(scenario_type, time_slot=None, params=None):
+    """Get volume multiplier based on scenario type (and time slot, see scenarios.json)"""
+    return resolve_scenario(scenario_type, time_slot, params).volume_multiplier
+
+def build_traffic_table(zones, params=None):
+    """Zone x day type x hour traffic factors for the city world"""
+    return TrafficTable([zone.traffic_level for zone in zones], params)
+
+def get_order_traffic_factors(zones, traffic, scenario_type, volume_multiplier):
+    """Per-order traffic factors for every zone (hourly table lookup x scenario volume)"""
+    return [traffic.order_factors(column, scenario_type, zone.orders) * volume_multiplier
+            for column, zone in enumerate(zones)]
+
+def generate_city_orders(zones, scenario_type, time_slot, volume_multiplier, params=None, streams=None, backend=None):
+    """First pass: generate orders for all zones, returns the city-wide order count"""
+    backend, params = resolve_backend(backend, params)
+    generate_orders = backend.generate_orders
+    total_city_orders = 0
+    for zone in zones:
+        # Generate orders with scenario-based volume
+        with span(zone.name, "zone"):
+            zone.orders = generate_orders(
+                zone.customers, scenario_type, time_slot, volume_multiplier, params, streams
+            )
+        total_city_orders += len(zone.orders)
+    metrics.orders_generated.inc(total_city_orders)
+    return total_city_orders
+
+def fulfil_city_orders(zones, inventory, params=None):
+    """Pick every zone's baskets from its dark store column (batched depletion)"""
+    params = params or default_parameters
+    for column, zone in enumerate(zones):
+        if zone.orders:
+            zone.fulfilled_items = inventory.fulfil(
+                column, zone.orders[0].basket, params["replenish_every_orders"]
+            )
+
+def assign_city_orders(zones, scenario_type, time_slot, traffic_factors, total_city_orders, base_delivery_time, params=None, streams=None, backend=None, profile=None):
+    """Second pass: add on-demand riders if needed and assign orders"""
+    profile = profile or null_profile
+    backend, params = resolve_backend(backend, params)
+    assign_riders = backend.assign_riders
+    with profile.phase("on-demand top-up", items=len(zones)):
+        for zone in zones:
+            # Add on-demand riders if total city orders > 300
+            add_on_demand_riders(zone, total_city_orders, params)
     
-    return multipliers.get(scenario_type, 1.0)
+    with profile.phase("assignment", items=total_city_orders):
+        locate_city_orders(zones, params)
+        for zone, order_traffic_factors in zip(zones, traffic_factors):
+            # Assign riders with capacity limits
+            with span(zone.name, "zone", orders=len(zone.orders)):
+                assign_riders(
+                    zone, scenario_type, time_slot, order_traffic_factors, 
+                    base_delivery_time, params, streams
+                )
+    unassigned = sum(len(zone.unassigned_orders) for zone in zones)
+    metrics.orders_assigned.inc(total_city_orders - unassigned)
+    metrics.orders_unassigned.inc(unassigned)
 
-def run_simulation(city_name, scenario_type, time_slot=None):
-    """Run the complete simulation with new scenario-based approach"""
-    zones = create_zones_from_city(city_name)
-    city_meta = city_metadata[city_name]
-    results = {}
+def compute_city_kpis(zones, total_city_orders, params=None, city_digest=None):
+    """Zone name -> KPI dict for every zone"""
+    return {zone.name: compute_kpis(zone, total_city_orders, params, city_digest) for zone in zones}
+
+def simulate_city_day(city_name, scenario_type, time_slot=None, params=None, streams=None,
+                      inventory=None, backend=None, profile=None):
+    """One city-day up to assignment; returns (zones with their assigned orders, city-wide order count)
+
+    run_simulation and the streaming pipeline (pipeline.py) both run this and
+    then log and reduce the zones their own way, so the two stay identical.
+    """
+    backend, params = resolve_backend(backend, params)
+    run_profile = profile or null_profile
     
-    # Get volume multiplier based on scenario
-    volume_multiplier = get_scenario_multiplier(scenario_type, time_slot)
+    with run_profile.phase("zone build") as phase:
+        zones = create_zones_from_city(city_name, params, stream_for(streams, "world"))
+        city_meta = city_metadata[city_name]
     
-    # Store zone data for traffic factor calculation
-    zone_data = {}
-    metadata = city_metadata[city_name]
-    num_zones = estimate_zone_count(metadata["area_sq_km"], metadata["avg_zone_size"])
-    zone_traffic_data = generate_zones(num_zones)
+        # Get volume multiplier based on scenario
+        volume_multiplier = get_scenario_multiplier(scenario_type, time_slot, params)
+        phase.items = sum(len(zone.customers) for zone in zones)
     
-    # First pass: Generate orders for all zones
-    total_city_orders = 0
-    for i, zone in enumerate(zones):
-        # Get traffic factor using the zone's assigned traffic level
-        zone_name = f"Zone_{i+1}"  # Match the zone naming convention
-        if zone_name in zone_traffic_data:
-            zone_traffic_level = zone_traffic_data[zone_name]["traffic_level"]
-        else:
-            zone_traffic_level = "moderate"  # Default fallback
-        
-        # Calculate traffic factor based on scenario
-        base_traffic_factor = get_base_traffic_factor(zone_traffic_level)
-        final_traffic_factor = base_traffic_factor * volume_multiplier
-        
-        # Generate orders with scenario-based volume
-        zone.orders = generate_orders(
-            zone.customers, scenario_type, time_slot, final_traffic_factor, volume_multiplier
+    with run_profile.phase("order generation") as phase:
+        total_city_orders = generate_city_orders(
+            zones, scenario_type, time_slot, volume_multiplier, params, streams, backend
         )
-        total_city_orders += len(zone.orders)
+        phase.items = total_city_orders
     
-    # Second pass: Add on-demand riders if needed and assign orders
-    for i, zone in enumerate(zones):
-        # Add on-demand riders if total city orders > 300
-        add_on_demand_riders(zone, total_city_orders)
-        
-        # Get traffic factor again
-        zone_name = f"Zone_{i+1}"  # Match the zone naming convention
-        if zone_name in zone_traffic_data:
-            zone_traffic_level = zone_traffic_data[zone_name]["traffic_level"]
-        else:
-            zone_traffic_level = "moderate"  # Default fallback
-            
-        base_traffic_factor = get_base_traffic_factor(zone_traffic_level)
-        final_traffic_factor = base_traffic_factor * volume_multiplier
-        
-        # Assign riders with capacity limits
-        assign_riders(
-            zone, scenario_type, time_slot, final_traffic_factor, 
-            city_meta["base_delivery_time"]
+    with run_profile.phase("inventory", items=total_city_orders):
+        fulfil_city_orders(zones, inventory or DarkStoreInventory.from_params(len(zones), params), params)
+    
+    with run_profile.phase("traffic", items=total_city_orders):
+        traffic = build_traffic_table(zones, params)
+        traffic_factors = get_order_traffic_factors(zones, traffic, scenario_type, volume_multiplier)
+    
+    assign_city_orders(
+        zones, scenario_type, time_slot, traffic_factors, total_city_orders,
+        city_meta["base_delivery_time"], params, streams, backend, profile
+    )
+    return zones, total_city_orders
+
+def run_simulation(city_name, scenario_type, time_slot=None, params=None, streams=None, event_log=None,
+                   inventory=None, backend=None, profile=None):
+    """Run the complete simulation with new scenario-based approach
+
+    Pass a RandomStreams to draw from per-customer/per-order streams (common
+    random numbers) instead of the global random module, and an OrderEventLog
+    to keep every order of the run. Without an inventory every zone starts
+    from a freshly stocked dark store. backend picks the compute engine
+    ("reference", "numpy" or "jit", see backends.py; default params["backend"],
+    which picks jit when numba is installed).
+    A RunProfile records time, memory and item counts per phase and is also
+    returned in results.attrs["profile"].
+    """
+    backend, params = resolve_backend(backend, params)
+    run_profile = profile or null_profile
+    
+    with span(f"{city_name} {scenario_type}", "city", city=city_name, scenario=scenario_type,
+              time_slot=time_slot, backend=backend.name):
+        zones, total_city_orders = simulate_city_day(
+            city_name, scenario_type, time_slot, params, streams, inventory, backend, profile
         )
+        if event_log is not None:
+            with run_profile.phase("event log", items=total_city_orders):
+                event_log.log_zones(zones, city_name, scenario_type)
         
-        # Compute KPIs
-        results[zone.name] = compute_kpis(zone, total_city_orders)
+        with run_profile.phase("kpis", items=len(zones)):
+            city_digest = TDigest()
+            results = compute_city_kpis(zones, total_city_orders, params, city_digest)
+            results = pd.DataFrame(results).T
     
-    return pd.DataFrame(results).T
+    # City-wide delivery-time sketch; mergeable across runs with merge_digests
+    results.attrs["delivery_digest"] = city_digest
+    if profile is not None:
+        results.attrs["profile"] = profile
+    metrics.simulation_runs.inc()
+    return results
 
-def get_base_traffic_factor(traffic_level):
-    """Get base traffic factor for zone traffic level"""
-    base_factors = {"low": 1.0, "moderate": 1.2, "high": 1.5}
-    return base_factors.get(traffic_level, 1.0)
+def summarize_city_results(results):
+    """Collapse zone-level KPIs into the city summary shown by print_results"""
+    total_orders = results['Total Orders'].sum()
+    assigned_orders = results['Assigned Orders'].sum()
+    return {
+        "Total Orders": total_orders,
+        "Assigned Orders": assigned_orders,
+        "Unassigned Orders": results['Unassigned Orders'].sum(),
+        "Assignment Rate": (assigned_orders / total_orders * 100) if total_orders > 0 else 0,
+        "SLA <10 mins": results['SLA <10 mins'].sum(),
+        "Avg OPH": results['Avg OPH'].mean(),
+        "Rider Utilization": results['Rider Utilization'].mean(),
+        "Fixed Riders": results['Fixed Riders'].sum(),
+        "On-Demand Riders": results['On-Demand Riders'].sum(),
+        "Cost/Delivery": results['Cost/Delivery'].mean(),
+        "Items/Order": results['Items/Order'].mean(),
+        "Wishlist Hit %": results['Wishlist Hit %'].mean(),
+        "Fill Rate %": results['Fill Rate %'].mean(),
+        "Partial Orders": results['Partial Orders'].sum(),
+        "Stockout Orders": results['Stockout Orders'].sum(),
+        **results.attrs.get("delivery_digest", TDigest()).percentiles()
+    }
 
-def add_on_demand_riders(zone, total_orders_city_wide):
+def add_on_demand_riders(zone, total_orders_city_wide, params=None):
     """Add on-demand riders if total city orders exceed 300"""
-    if total_orders_city_wide > 300:
+    params = params or default_parameters
+    if total_orders_city_wide > params["on_demand_order_threshold"]:
         # Calculate how many additional riders needed
-        additional_riders_needed = 1  # As specified, increase by 1
+        additional_riders_needed = params["on_demand_riders_per_zone"]  # As specified, increase by 1
         
         # Add on-demand riders to the zone
         current_on_demand_count = len([r for r in zone.riders if r.rider_type == "on_demand"])
@@ -139,9 +258,7 @@ def add_on_demand_riders(zone, total_orders_city_wide):
             rider_id = f"{zone.name}_OD{current_on_demand_count + i + 1}"
             on_demand_rider = Rider(id=rider_id, zone=zone.name, rider_type="on_demand")
             zone.riders.append(on_demand_rider)
-    """Get base traffic factor for zone traffic level"""
-    #base_factors = {"low": 1.0, "moderate": 1.2, "high": 1.5}
-    #return base_factors.get(traffic_level, 1.0)
+        metrics.on_demand_riders_added.inc(additional_riders_needed)
 
 def get_yearly_breakdown():
     """Return the breakdown of different day types in a year"""
@@ -155,30 +272,35 @@ def get_yearly_breakdown():
         "peak_hours_per_day": 2   # Morning and evening peak hours
     }
 
-def simulate_yearly_patterns(city_name):
-    """Simulate different patterns throughout the year"""
+def simulate_yearly_patterns(city_name, seed=None, params=None):
+    """Simulate different patterns throughout the year
+
+    With a seed every scenario shares common random numbers (same world, same
+    per-customer draws), so scenario differences aren't buried in sampling noise.
+    """
     yearly_data = get_yearly_breakdown()
+    streams = RandomStreams(seed) if seed is not None else None
     results = {}
     
     # Simulate BAU days
     print(f"Simulating {yearly_data['bau_days']} BAU days...")
-    results['BAU'] = run_simulation(city_name, "bau")
+    results['BAU'] = run_simulation(city_name, "bau", params=params, streams=streams)
     
     # Simulate peak days (Fri, Sat, Sun)
     print(f"Simulating {yearly_data['peak_days_yearly']} peak days...")
-    results['Peak Days'] = run_simulation(city_name, "peak_days")
+    results['Peak Days'] = run_simulation(city_name, "peak_days", params=params, streams=streams)
     
     # Simulate sale/event days
     print(f"Simulating {yearly_data['sale_days']} sale/event days...")
-    results['Sale Days'] = run_simulation(city_name, "event_sale")
+    results['Sale Days'] = run_simulation(city_name, "event_sale", params=params, streams=streams)
     
     # Simulate big event day
     print("Simulating 1 big event day...")
-    results['Big Event Day'] = run_simulation(city_name, "peak_hour_event")
+    results['Big Event Day'] = run_simulation(city_name, "peak_hour_event", params=params, streams=streams)
     
     # Simulate peak hours scenarios
     print("Simulating peak hours scenarios...")
-    results['Morning Peak Hours'] = run_simulation(city_name, "peak_hours", "morning_peak")
-    results['Evening Peak Hours'] = run_simulation(city_name, "peak_hours", "evening_peak")
+    results['Morning Peak Hours'] = run_simulation(city_name, "peak_hours", "morning_peak", params=params, streams=streams)
+    results['Evening Peak Hours'] = run_simulation(city_name, "peak_hours", "evening_peak", params=params, streams=streams)
     
     return results
\ No newline at end of file
@@ -0,0 +1,65 @@
+import numpy as np
+
+from parameters import default_parameters
+from catalog import get_catalog
+
+class DarkStoreInventory:
+    """Dark store stock for every zone of a city as a dense SKU x zone int32 matrix
+
+    Baskets are fulfilled a batch at a time: each requested unit is ranked among
+    the batch's requests for the same SKU and is filled if its rank is below the
+    stock on hand. Depletion is then a single bincount, so the cost grows with
+    the number of items, not orders x SKUs.
+    """
+
+    def __init__(self, par_levels, num_zones):
+        self.par_levels = np.asarray(par_levels, dtype=np.int32)
+        # Fortran order keeps each zone's column contiguous
+        self.stock = np.empty((len(self.par_levels), num_zones), dtype=np.int32, order="F")
+        self.stock[:] = self.par_levels[:, None]
+        self.replenishments = 0
+
+    @classmethod
+    def from_params(cls, num_zones, params=None):
+        """Par stock per SKU: the zone's units split by catalog popularity (at least 1 each)"""
+        params = params or default_parameters
+        catalog = get_catalog(params)
+        par_levels = np.ceil(catalog.probabilities * params["dark_store_units"])
+        return cls(par_levels, num_zones)
+
+    def replenish(self, zone=None):
+        """Replenishment event: top stock back up to par for one zone (or all)"""
+        if zone is None:
+            np.maximum(self.stock, self.par_levels[:, None], out=self.stock)
+        else:
+            self.stock[:, zone] = np.maximum(self.stock[:, zone], self.par_levels)
+        self.replenishments += 1
+
+    def _deplete(self, zone, skus):
+        """Fill one batch of requested SKUs in order; returns a filled flag per unit"""
+        order = np.argsort(skus, kind="stable")
+        sorted_skus = skus[order]
+        rank = np.arange(len(skus)) - np.searchsorted(sorted_skus, sorted_skus, side="left")
+        filled = np.empty(len(skus), dtype=bool)
+        filled[order] = rank < self.stock[sorted_skus, zone]
+        taken = np.bincount(skus[filled], minlength=len(self.par_levels))
+        self.stock[:, zone] -= taken.astype(np.int32)
+        return filled
+
+    def fulfil(self, zone, baskets, replenish_every=0):
+        """Fulfil a zone's baskets (Ragged rows, in arrival order); returns filled items per order
+
+        With replenish_every > 0 the zone is restocked to par after every that
+        many orders, so depletion runs in one batch per replenishment cycle.
+        """
+        num_orders = len(baskets)
+        filled = np.empty(len(baskets.values), dtype=bool)
+        step = replenish_every or max(num_orders, 1)
+        for start in range(0, num_orders, step):
+            if start:
+                self.replenish(zone)
+            lo = baskets.offsets[start]
+            hi = baskets.offsets[min(start + step, num_orders)]
+            filled[lo:hi] = self._deplete(zone, baskets.values[lo:hi])
+        return np.bincount(baskets.row_ids(), weights=filled, minlength=num_orders).astype(np.int64)
+
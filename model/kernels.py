@@ -0,0 +1,69 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# The loops below are sequential (each decision depends on the previous one),
+# so they don't vectorize; with numba installed they are compiled, otherwise
+# the same Python code runs as is and gives identical results.
+jit_available = njit is not None
+
+def _jit(function):
+    return njit(cache=True, nogil=True)(function) if jit_available else function
+
+def _assign_capacity(num_orders, loads, max_orders_per_rider):
+    rider_of_order = np.full(num_orders, -1, dtype=np.int64)
+    for i in range(num_orders):
+        # Least-loaded rider still under the cap; ties go to the first rider
+        best = -1
+        for r in range(len(loads)):
+            if loads[r] < max_orders_per_rider and (best < 0 or loads[r] < loads[best]):
+                best = r
+        if best < 0:
+            break
+        loads[best] += 1
+        rider_of_order[i] = best
+    return rider_of_order
+
+def _dispatch_intraday(arrivals, trip_minutes, free_at, loads, max_orders_per_rider):
+    num_orders = len(arrivals)
+    rider_of_order = np.full(num_orders, -1, dtype=np.int64)
+    start = np.zeros(num_orders, dtype=np.int64)
+    for i in range(num_orders):
+        # Rider who frees up first, among those under the cap (ties: first rider)
+        best = -1
+        for r in range(len(loads)):
+            if loads[r] < max_orders_per_rider and (best < 0 or free_at[r] < free_at[best]):
+                best = r
+        if best < 0:
+            break
+        start[i] = max(arrivals[i], free_at[best])
+        # Out to the customer and back before the next pickup
+        free_at[best] = start[i] + 2 * trip_minutes[i]
+        loads[best] += 1
+        rider_of_order[i] = best
+    return rider_of_order, start
+
+_assign_capacity_kernel = _jit(_assign_capacity)
+_dispatch_intraday_kernel = _jit(_dispatch_intraday)
+
+def assign_capacity(num_orders, loads, max_orders_per_rider, use_jit=True):
+    """Sequential least-loaded assignment with a per-rider cap
+
+    loads (int64, one per rider) is updated in place. Returns the rider index
+    of each order in arrival order, -1 once every rider is at the cap.
+    """
+    kernel = _assign_capacity_kernel if use_jit else _assign_capacity
+    return kernel(num_orders, loads, max_orders_per_rider)
+
+def dispatch_intraday(arrivals, trip_minutes, free_at, loads, max_orders_per_rider, use_jit=True):
+    """Intraday event loop: each order (in arrival order) goes to the rider free soonest
+
+    arrivals and trip_minutes are per order; free_at and loads are per rider
+    and updated in place. Returns (rider index or -1, pickup minute) per order.
+    """
+    kernel = _dispatch_intraday_kernel if use_jit else _dispatch_intraday
+    return kernel(np.asarray(arrivals, dtype=np.int64), np.asarray(trip_minutes, dtype=np.int64),
+                  free_at, loads, max_orders_per_rider)
@@ -1,6 +1,12 @@
+import argparse
+import json
+import sys
+
 from cityProfiles import city_metadata
-from dataGen import estimate_zone_count
+from datetime import date
 from interaction import run_simulation, simulate_yearly_patterns, get_yearly_breakdown
+from yearCalendar import simulate_calendar_year, yearly_report, monthly_report
+from batch import load_job, run_batch
 
 def print_banner():
     print("=" * 80)
@@ -12,7 +18,7 @@ def get_user_inputs():
     print("\nAvailable Cities:")
     for i, city in enumerate(city_metadata.keys(), 1):
         area = city_metadata[city]["area_sq_km"]
-        zones = estimate_zone_count(area, city_metadata[city]["avg_zone_size"])
+        zones = city_metadata[city]["zones"]
         riders = city_metadata[city]["total_riders"]
         print(f"{i}. {city} (Area: {area} sq km, ~{zones} zones, {riders} riders)")
     
@@ -33,13 +39,14 @@ def get_user_inputs():
     print("4. Peak Hour of Event Day - 200% higher volume")
     print("5. Business As Usual (BAU)")
     print("6. Yearly Pattern Analysis (All scenarios)")
+    print("7. Full-Year Calendar Simulation (365 days)")
     
     while True:
         try:
-            scenario_choice = int(input("Select scenario (1-6): "))
-            if 1 <= scenario_choice <= 6:
+            scenario_choice = int(input("Select scenario (1-7): "))
+            if 1 <= scenario_choice <= 7:
                 break
-            print("Invalid choice. Please enter 1-6.")
+            print("Invalid choice. Please enter 1-7.")
         except ValueError:
             print("Invalid choice. Please enter a number.")
     
@@ -49,7 +56,8 @@ def get_user_inputs():
         3: "event_sale",
         4: "peak_hour_event",
         5: "bau",
-        6: "yearly_analysis"
+        6: "yearly_analysis",
+        7: "calendar_year"
     }
     
     scenario_type = scenario_mapping[scenario_choice]
@@ -115,6 +123,13 @@ def print_results(results, city_name, scenario_type, time_slot=None):
     print(f"Total Fixed Riders: {results['Fixed Riders'].sum()}")
     print(f"Total On-Demand Riders: {results['On-Demand Riders'].sum()}")
     print(f"Average Cost per Delivery: ₹{results['Cost/Delivery'].mean():.2f}")
+    print(f"Average Basket: {results['Items/Order'].mean():.2f} items/order "
+          f"({results['Wishlist Hit %'].mean():.1f}% on wishlist)")
+    print(f"Dark Store Fill Rate: {results['Fill Rate %'].mean():.1f}% "
+          f"({results['Partial Orders'].sum()} partial, {results['Stockout Orders'].sum()} stocked-out orders)")
+    if "delivery_digest" in results.attrs:
+        p50, p90, p99 = results.attrs["delivery_digest"].quantile([0.5, 0.9, 0.99])
+        print(f"Delivery Time p50/p90/p99: {p50:.1f} / {p90:.1f} / {p99:.1f} mins")
     print("=" * 110)
 
 def print_yearly_analysis(results_dict, city_name):
@@ -160,8 +175,34 @@ def print_yearly_analysis(results_dict, city_name):
     print(f"Average Orders per Day: {yearly_orders/365:,.0f}")
     print("=" * 100)
 
-def main():
-    """Main execution function"""
+def print_calendar_analysis(daily, city_name, year):
+    """Print full-year calendar simulation results"""
+    print("\n" + "=" * 110)
+    print(f"CALENDAR YEAR {year} SIMULATION FOR {city_name.upper()}")
+    print("=" * 110)
+    
+    report = yearly_report(daily).loc[city_name]
+    print(f"{'Day Type':<16} {'Days':<6} {'Total Orders':<13} {'Orders/Day':<11} {'Std/Day':<9} {'Assignment%':<12} {'Avg OPH':<9} {'Avg Util%':<10} {'Avg Cost':<10}")
+    print("-" * 110)
+    for day_type, row in report.iterrows():
+        print(f"{day_type:<16} {row['Days']:<6.0f} {row['Total Orders']:<13,.0f} {row['Avg Orders/Day']:<11.1f} "
+              f"{row['Std Orders/Day']:<9.1f} {row['Assignment Rate']:<12.1f} {row['Avg OPH']:<9.2f} "
+              f"{row['Avg Util%']:<10.1f} ₹{row['Avg Cost']:<9.2f}")
+    print("-" * 110)
+    
+    months = monthly_report(daily).loc[city_name]
+    print(f"{'Month':<8} {'Total Orders':<13} {'Unassigned':<11} {'Assignment%':<12} {'Peak Day':<9}")
+    for month, row in months.iterrows():
+        print(f"{date(year, month, 1).strftime('%b'):<8} {row['Total Orders']:<13,.0f} {row['Unassigned Orders']:<11,.0f} "
+              f"{row['Assignment Rate']:<12.1f} {row['Peak Daily Orders']:<9,.0f}")
+    
+    total_orders = report['Total Orders'].sum()
+    print(f"\nTotal Orders in {year}: {total_orders:,.0f}")
+    print(f"Average Orders per Day: {total_orders/report['Days'].sum():,.0f}")
+    print("=" * 110)
+
+def interactive():
+    """Menu-driven front end: one city and scenario at a time"""
     print_banner()
     
     while True:
@@ -174,6 +215,12 @@ def main():
                 
                 results_dict = simulate_yearly_patterns(city_name)
                 print_yearly_analysis(results_dict, city_name)
+            elif scenario_type == "calendar_year":
+                year = date.today().year
+                print(f"\nSimulating every day of {year} for {city_name}...")
+                
+                daily = simulate_calendar_year([city_name], year)
+                print_calendar_analysis(daily, city_name, year)
             else:
                 print(f"\nRunning simulation for {city_name}...")
                 print("Please wait...")
@@ -198,5 +245,53 @@ def main():
     
     print("\nSimulation completed!")
 
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Delivery fleet simulation. Without arguments an interactive menu starts; "
+                    "with --job or --cities the job matrix runs headless."
+    )
+    parser.add_argument("--job", help="job file (JSON, TOML or YAML) with any of the settings below")
+    parser.add_argument("--cities", nargs="+", help="cities to simulate ('all' for every city)")
+    parser.add_argument("--scenarios", nargs="+",
+                        help="scenario names; 'peak_hours:evening_peak' picks one time slot")
+    parser.add_argument("--time-slots", nargs="+", help="time slots for scenarios that define them")
+    parser.add_argument("--seeds", nargs="+", help="seeds and ranges, e.g. 0-9 42")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", dest="overrides",
+                        help="parameter override with a JSON value, e.g. max_orders_per_rider=25")
+    parser.add_argument("--workers", type=int, help="worker processes (1 runs in this process)")
+    parser.add_argument("--output", help="output .jsonl or .parquet file ('-' for stdout)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"])
+    parser.add_argument("--city-registry", help="CSV or JSON city registry (default: model/cities.csv)")
+    parser.add_argument("--rollup", help="also write the national rollup per scenario and seed (.csv or .parquet)")
+    return parser
+
+def parse_overrides(pairs):
+    overrides = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except json.JSONDecodeError:
+            overrides[key] = value
+    return overrides
+
+def main(argv=None):
+    """Interactive menu without arguments, headless batch run otherwise"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        interactive()
+        return
+    args = build_parser().parse_args(argv)
+    if args.job is None and args.cities is None:
+        build_parser().error("a headless run needs --job or --cities")
+    cities = None if args.cities == ["all"] else args.cities
+    job = load_job(args.job, cities=cities, scenarios=args.scenarios, time_slots=args.time_slots,
+                   seeds=args.seeds, workers=args.workers, output=args.output, format=args.format,
+                   city_registry=args.city_registry, rollup=args.rollup)
+    job["overrides"] = {**job["overrides"], **parse_overrides(args.overrides)}
+    table = run_batch(job)
+    if job["output"] != "-":
+        print(f"{len(table)} runs written to {job['output']}", file=sys.stderr)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
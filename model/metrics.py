@@ -0,0 +1,147 @@
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+class Counter:
+    """Monotonic total; the engine adds whole batches (one inc per zone or run)"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+    def samples(self):
+        yield self.name, "", self.value
+
+class Histogram:
+    """Cumulative-bucket histogram; observe(value, count) records count equal observations at once"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        self.reset()
+
+    def observe(self, value, count=1):
+        self.counts[bisect_left(self.buckets, value)] += count
+        self.sum += value * count
+        self.count += count
+
+    def observe_many(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        slots = np.searchsorted(self.buckets, values, side="left")
+        self.counts += np.bincount(slots, minlength=len(self.counts))
+        self.sum += float(values.sum())
+        self.count += len(values)
+
+    def reset(self):
+        self.counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def samples(self):
+        cumulative = np.cumsum(self.counts).tolist()
+        for bound, total in zip(self.buckets, cumulative):
+            yield f"{self.name}_bucket", f'{{le="{bound:g}"}}', total
+        yield f"{self.name}_bucket", '{le="+Inf"}', cumulative[-1]
+        yield f"{self.name}_sum", "", self.sum
+        yield f"{self.name}_count", "", self.count
+
+def _format_value(value):
+    # Integers stay exact (a {:g} format would round large totals); numpy scalars become Python numbers
+    value = value.item() if isinstance(value, np.generic) else value
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """Named counters and histograms of this process, exported in Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if existing.kind != metric.kind:
+                raise ValueError(f"Metric {metric.name} is already registered as a {existing.kind}")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def reset(self):
+        for metric in self.metrics.values():
+            metric.reset()
+
+    def snapshot(self):
+        """Sample name (with labels) -> value for every metric"""
+        return {name + labels: value for metric in self.metrics.values()
+                for name, labels, value in metric.samples()}
+
+    def to_prometheus(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write a snapshot for the node_exporter textfile collector (atomic rename)"""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary, path)
+
+    def serve_prometheus(self, port=9109, host="127.0.0.1"):
+        """Serve /metrics from a background thread; returns the server (call shutdown() to stop)"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+# Process-wide registry and the engine's metrics. Pool workers count in their
+# own process: scrape or write one snapshot per worker for farm-wide graphs.
+registry = MetricsRegistry()
+
+simulation_runs = registry.counter("sim_runs_total", "City/scenario simulation runs completed")
+orders_generated = registry.counter("sim_orders_generated_total", "Orders generated")
+orders_assigned = registry.counter("sim_orders_assigned_total", "Orders assigned to a rider")
+orders_unassigned = registry.counter("sim_orders_unassigned_total", "Orders left without a rider")
+on_demand_riders_added = registry.counter("sim_on_demand_riders_added_total",
+                                          "On-demand riders added by add_on_demand_riders")
+events_processed = registry.counter("sim_events_processed_total", "Order events written to event logs")
+riders_scanned = registry.histogram("sim_riders_scanned", "Riders scanned per order assignment",
+                                    [1, 2, 5, 10, 20, 50, 100, 200, 500])
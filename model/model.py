@@ -1,204 +1,259 @@
 from datetime import datetime, timedelta
 import random
+import numpy as np
 from definitions import Order
+from parameters import default_parameters
+from streams import stream_for, KeyedUniforms
+from sketches import TDigest
+from catalog import get_catalog, numpy_rng
+from ragged import Ragged
+from traffic import arrival_minutes
+from scenarios import resolve_scenario
+from kernels import assign_capacity, dispatch_intraday
+from geometry import travel_delivery_times
+import metrics
 
-def generate_orders(customers, scenario_type, time_slot, final_traffic_factor, volume_multiplier):
-    """Generate orders based on scenario type and volume multiplier"""
+def generate_orders(customers, scenario_type, time_slot, volume_multiplier, params=None, streams=None):
+    """Generate orders based on scenario type and volume multiplier
+
+    Orders are returned in arrival order; arrival times fall in the time slot
+    (or anywhere in the day) and drive the hourly traffic lookup at assignment.
+    """
+    params = params or default_parameters
     orders = []
+    scenario = resolve_scenario(scenario_type, time_slot, params)
     
     # Base probability for order generation
-    base_prob = get_base_probability(scenario_type, time_slot)
+    base_prob = scenario.base_probability
     
     # Adjust probability based on volume multiplier
-    adjusted_prob = min(base_prob * volume_multiplier, 0.95)  # Cap at 95%
+    adjusted_prob = min(base_prob * volume_multiplier, params["max_order_probability"])  # Cap at 95%
+    
+    # Per-order plan: (customer row, wishlist items, catalog items)
+    rows = []
+    wishlist_counts = []
+    catalog_counts = []
+    catalog_keys = []
     
     for customer in customers:
         # Generate orders based on scenario-specific logic
-        if should_generate_order(customer, scenario_type, adjusted_prob):
-            items = get_order_items(customer, scenario_type)
-            is_scheduled = is_order_scheduled(scenario_type)
+        if should_generate_order(customer, scenario, adjusted_prob, stream_for(streams, "order", customer.id)):
+            wishlist_count, catalog_count = plan_order_items(customer, scenario, stream_for(streams, "items", customer.id))
+            is_scheduled = is_order_scheduled(scenario, stream_for(streams, "schedule", customer.id))
             
             order = Order(
                 customer=customer, 
-                items=items, 
                 scheduled=is_scheduled, 
-                timestamp=datetime.now()
+                timestamp=None,
+                index=len(orders)
             )
             orders.append(order)
+            rows.append(customer.index)
+            wishlist_counts.append(wishlist_count)
+            catalog_counts.append(catalog_count)
+            if streams is not None:
+                catalog_keys.append(streams.stream("catalog", customer.id).getrandbits(64))
+    
+    if orders:
+        # With common random numbers every basket's SKUs come from its customer's own stream
+        keyed = KeyedUniforms(catalog_keys, streams.antithetic) if streams is not None else None
+        baskets = build_baskets(customers[0].wishlists, rows, wishlist_counts, catalog_counts,
+                                params, stream_for(streams, "catalog", customers[0].zone), keyed)
+        day_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        minutes = arrival_minutes(len(orders), time_slot, numpy_rng(stream_for(streams, "arrival", customers[0].zone)))
+        for order, minute in zip(orders, minutes.tolist()):
+            order.basket = baskets
+            order.timestamp = day_start + timedelta(minutes=minute)
     
     return orders
 
-def get_base_probability(scenario_type, time_slot):
-    """Get base probability for order generation based on scenario"""
-    # probabilities = {
-    #    "bau": 0.25,
-    #    "peak_hours": 0.30,
-    #    "peak_days": 0.35,
-    #    "event_sale": 0.45,
-    #    "peak_hour_event": 0.65
-    # }
-
-    probabilities = {
-        "bau": 0.35,
-        "peak_hours": 0.25,
-        "peak_days": 0.30,
-        "event_sale": 0.45,
-        "peak_hour_event": 0.60
-    }
-    
-    # Adjust for specific time slots during peak hours
-    if scenario_type == "peak_hours":
-        if time_slot == "morning_peak":  # 07:00-11:00
-            return probabilities["peak_hours"] * 1.2
-        elif time_slot == "evening_peak":  # 19:00-23:00
-            return probabilities["peak_hours"] * 1.3
-        else:
-            return probabilities["bau"]
+def build_baskets(wishlists, rows, wishlist_counts, catalog_counts, params=None, rng=random, keyed=None):
+    """Fill every basket of a zone at once as CSR rows
     
-    return probabilities.get(scenario_type, 0.25)
+    Wishlist picks are one vectorized gather over the zone's wishlist rows and
+    catalog SKUs one alias-method draw; an order takes items from one source only.
+    With keyed (KeyedUniforms, one key per order) the draws come from each
+    order's key instead of rng, so a basket does not shift when other orders change.
+    """
+    wishlist_counts = np.asarray(wishlist_counts, dtype=np.int64)
+    catalog_counts = np.asarray(catalog_counts, dtype=np.int64)
+    from_wishlist = wishlist_counts > 0
+    wishlist_rows = np.asarray(rows, dtype=np.int64)[from_wishlist]
+    catalog = get_catalog(params)
+    if keyed is None:
+        np_rng = numpy_rng(rng)
+        picks = wishlists.sample_rows(wishlist_rows, wishlist_counts[from_wishlist], np_rng)
+        skus = catalog.sample(int(catalog_counts.sum()), np_rng)
+    else:
+        sort_keys = keyed.uniforms(wishlists.lengths()[wishlist_rows], salt=0, entities=from_wishlist)
+        picks = wishlists.sample_rows(wishlist_rows, wishlist_counts[from_wishlist], uniforms=sort_keys)
+        u = keyed.uniforms(2 * catalog_counts, salt=1)
+        skus = catalog.pick(u[0::2], u[1::2])
+    
+    lengths = wishlist_counts + catalog_counts
+    values = np.empty(int(lengths.sum()), dtype=np.int32)
+    wishlist_slots = np.repeat(from_wishlist, lengths)
+    values[wishlist_slots] = picks.values
+    values[~wishlist_slots] = skus
+    return Ragged.from_lengths(lengths, values)
 
-def should_generate_order(customer, scenario_type, probability):
-    """Determine if a customer should place an order"""
+def get_base_probability(scenario_type, time_slot, params=None):
+    """Get base probability for order generation based on scenario"""
+    return resolve_scenario(scenario_type, time_slot, params).base_probability
+
+def should_generate_order(customer, scenario, probability, rng=random):
+    """Determine if a customer should place an order (scenario is a ScenarioSpec)"""
     # Base random check
-    if random.random() > probability:
+    if rng.random() > probability:
         return False
     
-    # Scenario-specific logic
-    if scenario_type == "bau":
-        # Regular behavior - wallet users more likely to order
-        return customer.has_wallet or random.random() < 0.3
-    
-    elif scenario_type == "peak_hours":
-        # Peak hours - higher chance for all customers
-        return random.random() < 0.8
-    
-    elif scenario_type == "peak_days":
-        # Weekend/peak days - more leisure orders
-        return random.random() < 0.75
-    
-    elif scenario_type == "event_sale":
-        # Sale days - everyone more likely to order
-        return random.random() < 0.85
-    
-    elif scenario_type == "peak_hour_event":
-        # Big event - almost everyone orders
-        return random.random() < 0.9
-    
-    return True
+    # Wallet users skip the scenario's acceptance check where it says so (BAU)
+    if scenario.wallet_always_orders and customer.has_wallet:
+        return True
+    return rng.random() < scenario.order_acceptance
 
-def get_order_items(customer, scenario_type):
-    """Get items for order based on scenario type"""
-    if scenario_type in ["event_sale", "peak_hour_event"]:
-        # During sales/events, customers order more items
-        if customer.wishlist_items and random.random() < 0.7:
-            # 70% chance to order from wishlist during events
-            num_items = min(len(customer.wishlist_items), random.randint(2, 5))
-            return random.sample(customer.wishlist_items, num_items)
-        else:
-            # Order random items (more during events)
-            return [f"item_{random.randint(1, 20)}" for _ in range(random.randint(2, 6))]
-    
-    elif scenario_type == "peak_days":
-        # Weekend orders - mix of wishlist and random
-        if customer.wishlist_items and random.random() < 0.5:
-            num_items = min(len(customer.wishlist_items), random.randint(1, 3))
-            return random.sample(customer.wishlist_items, num_items)
-        else:
-            return [f"item_{random.randint(1, 15)}" for _ in range(random.randint(1, 4))]
-    
-    else:
-        # BAU and peak hours - regular order size
-        if customer.wishlist_items and random.random() < 0.4:
-            num_items = min(len(customer.wishlist_items), random.randint(1, 2))
-            return random.sample(customer.wishlist_items, num_items)
-        else:
-            return [f"item_{random.randint(1, 10)}" for _ in range(random.randint(1, 3))]
+def plan_order_items(customer, scenario, rng=random):
+    """Decide how many items an order takes and from where, based on the scenario
+
+    Returns (wishlist_items, catalog_items) counts; exactly one is non-zero.
+    The SKUs themselves are drawn for the whole zone by build_baskets.
+    """
+    wishlist_size = customer.wishlist_size
+    if wishlist_size and rng.random() < scenario.wishlist_probability:
+        return min(wishlist_size, rng.randint(*scenario.wishlist_items)), 0
+    return 0, rng.randint(*scenario.catalog_items)
 
-def is_order_scheduled(scenario_type):
+def is_order_scheduled(scenario, rng=random):
     """Determine if order is scheduled based on scenario"""
-    if scenario_type == "bau":
-        return random.random() < 0.3  # 30% scheduled during BAU
-    elif scenario_type in ["event_sale", "peak_hour_event"]:
-        return random.random() < 0.1  # 10% scheduled during events (more urgent)
-    else:
-        return random.random() < 0.2  # 20% scheduled during other scenarios
+    return rng.random() < scenario.scheduled_probability
+
+def assign_riders(zone, scenario_type, time_slot, traffic_factors, base_delivery_time, params=None, streams=None):
+    """Assign riders to orders with capacity limits and scenario-specific delivery time calculation
 
-def assign_riders(zone, scenario_type, time_slot, traffic_factor, base_delivery_time):
-    """Assign riders to orders with capacity limits and scenario-specific delivery time calculation"""
-    max_orders_per_rider = 20  # Maximum orders a rider can handle per day
+    traffic_factors holds one factor per order (see TrafficTable.order_factors).
+    The sequential rider choice runs in kernels.py (numba-compiled when installed).
+    With intraday_dispatch, riders serve one order at a time and an order's
+    delivery time includes its wait for the next free rider.
+    """
+    params = params or default_parameters
+    scenario = resolve_scenario(scenario_type, time_slot, params)
+    max_orders_per_rider = params["max_orders_per_rider"]  # Maximum orders a rider can handle per day
+    use_jit = params["use_jit"]
+    orders = zone.orders
+    traffic_factors = np.asarray(traffic_factors).tolist()
+    # Distance model: ride times were located per order (geometry.locate_city_orders)
+    travel_times = None
+    if params["delivery_model"] != "jitter":
+        travel_times = travel_delivery_times(scenario, traffic_factors, zone.order_travel_minutes, params).tolist()
+    
+    # All riders start the day empty
+    loads = np.zeros(len(zone.riders), dtype=np.int64)
     
-    # Reset all rider capacities
-    for rider in zone.riders:
-        rider.orders_delivered = 0
-        rider.available = True
+    if params["intraday_dispatch"]:
+        # Trip times for every order up front; the event loop then decides who waits
+        trips = travel_times or [
+            calculate_delivery_time(scenario, traffic_factor, base_delivery_time,
+                                    stream_for(streams, "delivery", order.customer.id))
+            for order, traffic_factor in zip(orders, traffic_factors)
+        ]
+        arrivals = [order.timestamp.hour * 60 + order.timestamp.minute for order in orders]
+        rider_of_order, pickups = dispatch_intraday(
+            arrivals, trips, np.zeros(len(zone.riders), dtype=np.int64), loads, max_orders_per_rider, use_jit
+        )
+        waits = (pickups - np.asarray(arrivals, dtype=np.int64)).tolist()
+    else:
+        rider_of_order = assign_capacity(len(orders), loads, max_orders_per_rider, use_jit)
     
     unassigned_orders = []
     
-    for order in zone.orders:
-        # Find available riders with capacity
-        available_riders = [
-            r for r in zone.riders 
-            if r.available and r.orders_delivered < max_orders_per_rider
-        ]
-        
-        if available_riders:
-            # Assign to rider with least orders (load balancing)
-            rider = min(available_riders, key=lambda r: r.orders_delivered)
-            rider.orders_delivered += 1
-            
+    for i, (order, r) in enumerate(zip(orders, rider_of_order.tolist())):
+        if r >= 0:
             # Calculate delivery time based on scenario and traffic
-            delivery_minutes = calculate_delivery_time(
-                scenario_type, time_slot, traffic_factor, base_delivery_time
-            )
+            if params["intraday_dispatch"]:
+                delivery_minutes = waits[i] + trips[i]
+            elif travel_times is not None:
+                delivery_minutes = travel_times[i]
+            else:
+                delivery_minutes = calculate_delivery_time(
+                    scenario, traffic_factors[i], base_delivery_time,
+                    stream_for(streams, "delivery", order.customer.id)
+                )
             
             order.delivery_time = order.timestamp + timedelta(minutes=delivery_minutes)
-            order.assigned_rider = rider.id
-            
-            # Mark rider as temporarily unavailable if at capacity
-            if rider.orders_delivered >= max_orders_per_rider:
-                rider.available = False
+            order.delivery_minutes = delivery_minutes
+            order.assigned_rider = zone.riders[r].id
         else:
             # No available riders - order remains unassigned
             unassigned_orders.append(order)
             order.delivery_time = None
+            order.delivery_minutes = None
             order.assigned_rider = None
     
+    # Both kernels look at every rider for each order they place
+    metrics.riders_scanned.observe(len(zone.riders), len(orders) - len(unassigned_orders))
+    
+    # Riders at capacity are unavailable for the rest of the day
+    for rider, load in zip(zone.riders, loads.tolist()):
+        rider.orders_delivered = load
+        rider.available = load < max_orders_per_rider
+    
     # Store unassigned orders info
     zone.unassigned_orders = unassigned_orders
 
-def calculate_delivery_time(scenario_type, time_slot, traffic_factor, base_delivery_time):
+def calculate_delivery_time(scenario, traffic_factor, base_delivery_time, rng=random):
     """Calculate delivery time based on scenario-specific factors"""
     # Start with base delivery time
-    base_time = base_delivery_time + random.randint(-2, 3)
-    
-    # Scenario-specific adjustments
-    if scenario_type == "peak_hour_event":
-        # Big event - significantly longer delivery times due to high volume
-        base_time *= 2.5
-    elif scenario_type == "event_sale":
-        # Sale days - longer delivery times
-        base_time *= 1.8
-    elif scenario_type == "peak_days":
-        # Weekend/peak days - moderately longer
-        base_time *= 1.4
-    elif scenario_type == "peak_hours":
-        # Peak hours - slight increase
-        if time_slot == "evening_peak":
-            base_time *= 1.3  # Evening peak is busier
-        elif time_slot == "morning_peak":
-            base_time *= 1.2
+    base_time = base_delivery_time + rng.randint(-2, 3)
+    
+    # Scenario (and time slot) adjustment, e.g. 2.5x on big event days
+    base_time *= scenario.delivery_multiplier
     
     # Apply traffic factor
     final_time = int(base_time * traffic_factor)
     
     # Add some randomness but keep realistic bounds
-    final_time += random.randint(-1, 3)
+    final_time += rng.randint(-1, 3)
     
     # Ensure minimum delivery time
     return max(final_time, 5)
 
-def compute_kpis(zone, total_city_orders=0):
-    """Compute KPIs for the zone with new rider utilization logic"""
+def basket_statistics(orders):
+    """(items per order, wishlist hit rate) of a zone's orders as array reductions
+
+    The hit rate is the share of basket items that are on the ordering
+    customer's wishlist, whichever source they were drawn from.
+    """
+    if not orders:
+        return 0.0, 0.0
+    baskets = orders[0].basket
+    wishlists = orders[0].customer.wishlists
+    owners = np.fromiter((o.customer.index for o in orders), dtype=np.int64, count=len(orders))
+    
+    # (customer, SKU) pairs packed into one int64 key, then a single membership test
+    width = int(max(wishlists.values.max(initial=0), baskets.values.max(initial=0))) + 1
+    wished = wishlists.row_ids() * width + wishlists.values
+    bought = owners[baskets.row_ids()] * width + baskets.values
+    hits = np.isin(bought, wished)
+    return float(baskets.lengths().mean()), float(hits.mean()) if len(hits) else 0.0
+
+def fulfilment_statistics(zone):
+    """(item fill rate, partially filled orders, orders with nothing in stock)"""
+    if zone.fulfilled_items is None or not zone.orders:
+        return 1.0, 0, 0
+    requested = zone.orders[0].basket.lengths()
+    filled = zone.fulfilled_items
+    fill_rate = filled.sum() / requested.sum() if requested.sum() else 1.0
+    partial_orders = int(np.count_nonzero((filled > 0) & (filled < requested)))
+    stockout_orders = int(np.count_nonzero(filled == 0))
+    return float(fill_rate), partial_orders, stockout_orders
+
+def compute_kpis(zone, total_city_orders=0, params=None, city_digest=None):
+    """Compute KPIs for the zone with new rider utilization logic
+
+    Delivery-time percentiles come from a per-zone t-digest, which is merged
+    into city_digest when one is passed.
+    """
+    params = params or default_parameters
     total_orders = len(zone.orders)
     unassigned_orders = len(getattr(zone, 'unassigned_orders', []))
     assigned_orders = total_orders - unassigned_orders
@@ -213,22 +268,36 @@ def compute_kpis(zone, total_city_orders=0):
             "Rider Utilization": 0,
             "Fixed Riders": 0,
             "On-Demand Riders": 0,
-            "Cost/Delivery": 0
+            "Cost/Delivery": 0,
+            "Items/Order": 0,
+            "Wishlist Hit %": 0,
+            "Fill Rate %": 100.0,
+            "Partial Orders": 0,
+            "Stockout Orders": 0,
+            **TDigest().percentiles()
         }
     
     # Count orders delivered under 10 minutes (only assigned orders)
+    sla_seconds = params["sla_minutes"] * 60
     delivered_under_10 = sum(
         1 for o in zone.orders 
-        if o.delivery_time and (o.delivery_time - o.timestamp).total_seconds() <= 600
+        if o.delivery_time and (o.delivery_time - o.timestamp).total_seconds() <= sla_seconds
     )
     
+    # Delivery-time distribution, fed to the sketch as one batch per zone
+    zone_digest = TDigest().update(
+        [o.delivery_minutes for o in zone.orders if o.delivery_minutes is not None]
+    )
+    if city_digest is not None:
+        city_digest.merge(zone_digest)
+    
     # Count rider types
     fixed_riders = len([r for r in zone.riders if r.rider_type == "fixed"])
     on_demand_riders = len([r for r in zone.riders if r.rider_type == "on_demand"])
     total_riders = len(zone.riders)
     
     # Calculate rider utilization based on 20 orders per rider = 100%
-    max_orders_per_rider = 20
+    max_orders_per_rider = params["max_orders_per_rider"]
     total_possible_orders = total_riders * max_orders_per_rider
     total_delivered = sum(r.orders_delivered for r in zone.riders)
     
@@ -236,19 +305,22 @@ def compute_kpis(zone, total_city_orders=0):
     rider_utilization = (total_delivered / total_possible_orders) * 100 if total_possible_orders > 0 else 0
     
     # Calculate average orders per hour per rider (assuming 8-hour working day)
-    avg_oph = total_delivered / (total_riders * 8) if total_riders > 0 else 0
+    avg_oph = total_delivered / (total_riders * params["working_hours"]) if total_riders > 0 else 0
     
     # Calculate cost per delivery
     # Fixed riders: ₹400/day (₹50/hour * 8 hours)
     # On-demand riders: ₹500/day (higher cost for flexibility)
     # Variable cost: ₹15 per delivery
-    fixed_rider_cost = fixed_riders * 400
-    on_demand_rider_cost = on_demand_riders * 500
-    variable_cost = assigned_orders * 15
+    fixed_rider_cost = fixed_riders * params["fixed_rider_cost"]
+    on_demand_rider_cost = on_demand_riders * params["on_demand_rider_cost"]
+    variable_cost = assigned_orders * params["variable_cost_per_order"]
     total_cost = fixed_rider_cost + on_demand_rider_cost + variable_cost
     
     cost_per_delivery = total_cost / assigned_orders if assigned_orders > 0 else 0
     
+    items_per_order, wishlist_hit_rate = basket_statistics(zone.orders)
+    fill_rate, partial_orders, stockout_orders = fulfilment_statistics(zone)
+    
     return {
         "Total Orders": total_orders,
         "Assigned Orders": assigned_orders,
@@ -258,5 +330,11 @@ def compute_kpis(zone, total_city_orders=0):
         "Rider Utilization": round(rider_utilization, 2),  # Percentage based on 20 orders = 100%
         "Fixed Riders": fixed_riders,
         "On-Demand Riders": on_demand_riders,
-        "Cost/Delivery": round(cost_per_delivery, 2)
+        "Cost/Delivery": round(cost_per_delivery, 2),
+        "Items/Order": round(items_per_order, 2),
+        "Wishlist Hit %": round(wishlist_hit_rate * 100, 2),
+        "Fill Rate %": round(fill_rate * 100, 2),
+        "Partial Orders": partial_orders,
+        "Stockout Orders": stockout_orders,
+        **zone_digest.percentiles()
     }
\ No newline at end of file
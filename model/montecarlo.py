@@ -0,0 +1,188 @@
+import math
+from contextlib import nullcontext
+from multiprocessing import Pool
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from parameters import resolve_parameters
+from interaction import run_simulation, summarize_city_results
+from streams import RandomStreams
+from tracing import pool_options
+
+# City-level KPIs reported by summarize_city_results
+kpi_columns = [
+    "Total Orders", "Assigned Orders", "Unassigned Orders", "Assignment Rate",
+    "SLA <10 mins", "Avg OPH", "Rider Utilization", "On-Demand Riders", "Cost/Delivery"
+]
+
+def t_quantile(confidence, dof):
+    """Two-sided Student-t critical value (Cornish-Fisher expansion around the normal)"""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    if dof <= 0:
+        return math.inf
+    return (z + (z ** 3 + z) / (4 * dof)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3))
+
+def confidence_interval(values, confidence=0.95):
+    """Mean and CI half-width of i.i.d. observations"""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    mean = values.mean() if n else math.nan
+    if n < 2:
+        return mean, math.inf
+    return mean, t_quantile(confidence, n - 1) * values.std(ddof=1) / math.sqrt(n)
+
+def _split_scenario(scenario):
+    return scenario if isinstance(scenario, tuple) else (scenario, None)
+
+def _replicate(task):
+    """Run every scenario of one replication; shared streams give common random numbers"""
+    city_name, scenarios, overrides, seed, antithetic, common_random_numbers = task
+    params = resolve_parameters(overrides)
+    summaries = []
+    for j, scenario in enumerate(scenarios):
+        scenario_type, time_slot = _split_scenario(scenario)
+        stream_seed = seed if common_random_numbers else f"{seed}/{j}"
+        streams = RandomStreams(stream_seed, antithetic)
+        summaries.append(summarize_city_results(
+            run_simulation(city_name, scenario_type, time_slot, params, streams)
+        ))
+    return summaries
+
+def _replication_tasks(city_name, scenarios, replications, seed, overrides, antithetic,
+                       common_random_numbers):
+    # With antithetic variates replication 2i and 2i+1 share a seed, the second mirrored
+    if antithetic:
+        replications += replications % 2
+    tasks = []
+    for i in range(replications):
+        if antithetic:
+            tasks.append((city_name, scenarios, overrides, seed + i // 2, i % 2 == 1,
+                          common_random_numbers))
+        else:
+            tasks.append((city_name, scenarios, overrides, seed + i, False, common_random_numbers))
+    return tasks
+
+def _run_tasks(tasks, workers):
+    if workers == 1:
+        return list(map(_replicate, tasks))
+    with Pool(processes=workers, **pool_options()) as pool:
+        return pool.map(_replicate, tasks, chunksize=max(1, len(tasks) // (4 * (workers or 4))))
+
+def _observations(frame, antithetic):
+    """Collapse antithetic pairs into one i.i.d. observation each"""
+    if not antithetic:
+        return frame
+    return frame.groupby(np.arange(len(frame)) // 2).mean()
+
+def run_replications(city_name, scenario, replications=30, seed=0, overrides=None,
+                     antithetic=False, workers=None):
+    """Independent replications of one scenario; one summary row per replication"""
+    tasks = _replication_tasks(city_name, [scenario], replications, seed, overrides or {},
+                               antithetic, True)
+    rows = [summaries[0] for summaries in _run_tasks(tasks, workers)]
+    frame = pd.DataFrame(rows)
+    frame.insert(0, "antithetic", [task[4] for task in tasks])
+    frame.insert(0, "seed", [task[3] for task in tasks])
+    return frame
+
+def paired_comparison(city_name, baseline, alternative, replications=30, seed=0,
+                      overrides=None, antithetic=False, common_random_numbers=True,
+                      workers=None, confidence=0.95):
+    """Paired difference (alternative - baseline) per KPI with confidence intervals
+
+    Scenarios are "bau" style names or ("peak_hours", "evening_peak") tuples.
+    Each replication runs both scenarios on the same world and the same
+    per-customer streams, so the CI is on the paired difference rather than
+    on two independent means. With antithetic=True replications come in
+    mirrored pairs whose averages form the observations.
+    """
+    tasks = _replication_tasks(city_name, [baseline, alternative], replications, seed,
+                               overrides or {}, antithetic, common_random_numbers)
+    results = _run_tasks(tasks, workers)
+    base = _observations(pd.DataFrame([r[0] for r in results])[kpi_columns], antithetic)
+    alt = _observations(pd.DataFrame([r[1] for r in results])[kpi_columns], antithetic)
+    diff = alt - base
+
+    rows = {}
+    for kpi in kpi_columns:
+        mean, half_width = confidence_interval(diff[kpi], confidence)
+        rows[kpi] = {
+            "Baseline Mean": base[kpi].mean(),
+            "Alternative Mean": alt[kpi].mean(),
+            "Difference": mean,
+            "CI Low": mean - half_width,
+            "CI High": mean + half_width,
+            "Half Width": half_width,
+            # Var(independent difference) / Var(paired difference): > 1 means pairing helped
+            "Variance Reduction": ((base[kpi].var() + alt[kpi].var()) / diff[kpi].var()
+                                   if diff[kpi].var() > 0 else math.inf),
+            "Observations": len(diff)
+        }
+    return pd.DataFrame(rows).T
+
+def _target_met(values, target, confidence):
+    """True when the CI half-width is within target (absolute, or "2%" relative to the mean)"""
+    mean, half_width = confidence_interval(values, confidence)
+    if isinstance(target, str) and target.endswith("%"):
+        return half_width <= abs(mean) * float(target[:-1]) / 100
+    return half_width <= target
+
+def run_adaptive(city_name, scenarios, targets, batch_size=8, max_replications=400, seed=0,
+                 overrides=None, workers=None, confidence=0.95):
+    """Replicate each scenario until every KPI CI meets its target or the budget runs out
+
+    targets maps KPI -> CI half-width, e.g. {"Assignment Rate": 1.0, "Avg OPH": 0.5};
+    a string like "2%" is relative to the KPI mean. Each round launches one batch
+    for every scenario that hasn't converged yet, all on the same process pool,
+    so stable scenarios stop early and volatile ones keep the workers busy.
+    workers=1 runs the batches in-process.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    if max_replications < 2:
+        raise ValueError(f"max_replications must be at least 2 for a confidence interval, got {max_replications}")
+    overrides = overrides or {}
+    observations = {scenario: [] for scenario in scenarios}
+    pending = list(scenarios)
+
+    with nullcontext() if workers == 1 else Pool(processes=workers, **pool_options()) as pool:
+        run = pool.map if pool else lambda function, tasks: list(map(function, tasks))
+        while pending:
+            tasks = []
+            for scenario in pending:
+                start = len(observations[scenario])
+                size = min(batch_size, max_replications - start)
+                tasks.extend((scenario, (city_name, [scenario], overrides, seed + start + i, False, True))
+                             for i in range(size))
+            results = run(_replicate, [task for _, task in tasks])
+            for (scenario, _), summaries in zip(tasks, results):
+                observations[scenario].append(summaries[0])
+
+            still_pending = []
+            for scenario in pending:
+                frame = pd.DataFrame(observations[scenario])
+                converged = all(_target_met(frame[kpi], target, confidence)
+                                for kpi, target in targets.items())
+                if not converged and len(frame) < max_replications:
+                    still_pending.append(scenario)
+            pending = still_pending
+
+    rows = {}
+    for scenario, summaries in observations.items():
+        frame = pd.DataFrame(summaries)
+        row = {
+            "Replications": len(frame),
+            "Converged": all(_target_met(frame[kpi], target, confidence)
+                             for kpi, target in targets.items())
+        }
+        for kpi in targets:
+            mean, half_width = confidence_interval(frame[kpi], confidence)
+            row[f"{kpi} Mean"] = mean
+            row[f"{kpi} Half Width"] = half_width
+        label = " / ".join(scenario) if isinstance(scenario, tuple) else scenario
+        rows[label] = row
+    return pd.DataFrame(rows).T
@@ -0,0 +1,129 @@
+import copy
+import json
+import os
+
+def load_config_file(path):
+    """Parse a JSON, TOML or YAML file by extension"""
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if path.endswith((".yaml", ".yml")):
+        import yaml
+        with open(path) as f:
+            return yaml.safe_load(f)
+    with open(path) as f:
+        return json.load(f)
+
+def load_scenario_file(path=None):
+    """Scenario definitions from a JSON, TOML or YAML file (default: scenarios.json)"""
+    path = path or default_scenario_file
+    if path not in _scenario_files:
+        _scenario_files[path] = load_config_file(path)["scenarios"]
+    return _scenario_files[path]
+
+default_scenario_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.json")
+_scenario_files = {}
+
+# Tunable simulation constants. Every knob that used to be hard-coded inside
+# model.py / interaction.py lives here so sweeps can override it per run.
+default_parameters = {
+    # Scenario behaviour lives in the scenario file (see scenarios.py); None = scenarios.json
+    "scenario_file": None,
+    # Per-run overrides of a scenario's volume multiplier and base order
+    # probability, keyed by scenario name; scenarios not listed keep the
+    # values from the scenario file
+    "scenario_multipliers": {},
+    "base_probabilities": {},
+    # Per-run overrides of a time slot's probability / delivery multiplier,
+    # keyed "scenario:slot" (e.g. "peak_hours:evening_peak")
+    "slot_probability_multipliers": {},
+    "slot_delivery_multipliers": {},
+    "traffic_base_factors": {"low": 1.0, "moderate": 1.2, "high": 1.5},
+    # Hourly congestion multiplier (24 values, hour 0-23) per scenario; see traffic.py
+    "traffic_hour_curves": {
+        "bau": [1.0] * 24,
+        "peak_hours": [1.0] * 24,
+        "peak_days": [1.0] * 24,
+        "event_sale": [1.0] * 24,
+        "peak_hour_event": [1.0] * 24
+    },
+    "max_order_probability": 0.95,
+    # Customers per zone, drawn uniformly from [min, max] (see dataGen.generate_zones)
+    "customers_per_zone": [50, 200],
+    # Rider capacity and fleet sizing
+    "max_orders_per_rider": 20,
+    "fixed_riders_per_city": None,  # Same fleet for every city; None = each city's registry riders
+    "on_demand_order_threshold": 300,
+    "on_demand_riders_per_zone": 1,
+    "working_hours": 8,
+    # Riders serve one order at a time (arrival-ordered event loop) instead of a daily cap only
+    "intraday_dispatch": False,
+    # Compile the sequential assignment loops with numba when it is installed
+    # (the numpy backend; "reference" always runs them in plain Python, "jit" always compiles)
+    "use_jit": True,
+    # Compute engine: "reference", "numpy" or "jit" (see backends.py); None = jit when
+    # numba is installed, else reference
+    "backend": None,
+    # SKU catalog used for non-wishlist items (see catalog.py)
+    "catalog_size": 20,
+    "catalog_popularity": "zipf",
+    "catalog_zipf_exponent": 1.0,
+    # Dark store stock per zone, split across SKUs by popularity (see inventory.py)
+    "dark_store_units": 300,
+    "replenish_every_orders": 0,  # Restock to par after this many orders per zone (0 = once per run)
+    # Delivery times: "jitter" (random spread around the city base time, see
+    # model.calculate_delivery_time), "distance" (customers placed in the
+    # zone's disc, ride time from road distance and rider speed, see geometry.py)
+    # or "road_grid" (shortest paths over a synthetic street grid, see roadGrid.py)
+    "delivery_model": "jitter",
+    "rider_speed_kmph": 20,
+    "road_circuity": 1.3,  # Road distance / straight-line distance
+    "handling_minutes": 4,  # Pick, pack and hand-over on top of the ride
+    "road_grid_cell_km": 0.25,
+    "road_grid_variants": 8,  # Distinct street grids per city; zone i rides grid i % variants
+    "road_grid_arterial_every": 4,  # Every n-th row and column of cells is an arterial
+    "arterial_speed_kmph": 30,
+    "road_grid_slowdown_sigma": 0.4,  # Lognormal per-cell slowdown of side streets
+    "road_grid_seed": 0,
+    "road_grid_cache": None,  # Directory for memory-mapped .npy tables (None = keep in memory)
+    # Costs (₹)
+    "fixed_rider_cost": 400,
+    "on_demand_rider_cost": 500,
+    "variable_cost_per_order": 15,
+    "sla_minutes": 10
+}
+
+def resolve_parameters(overrides=None):
+    """Return a full parameter set with dotted-path overrides applied
+
+    Overrides use dotted keys for nested values, e.g.
+    {"scenario_multipliers.event_sale": 1.6, "max_orders_per_rider": 25}
+    """
+    params = copy.deepcopy(default_parameters)
+    for key, value in (overrides or {}).items():
+        *path, leaf = key.split(".")
+        target = params
+        for part in path:
+            if not isinstance(target.get(part), dict):
+                raise ValueError(f"Unknown parameter: {key}")
+            target = target[part]
+        # Scenario overrides may name any scenario (or time slot) of the scenario file
+        if leaf not in target and path not in [[key] for key in scenario_override_keys]:
+            raise ValueError(f"Unknown parameter: {key}")
+        target[leaf] = value
+    return params
+
+scenario_override_keys = ("scenario_multipliers", "base_probabilities",
+                          "slot_probability_multipliers", "slot_delivery_multipliers")
+
+def flatten_parameters(params=None):
+    """Flatten a (nested) parameter set into dotted keys"""
+    flat = {}
+    for key, value in (params or default_parameters).items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}.{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
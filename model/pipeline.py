@@ -0,0 +1,156 @@
+import random
+import sys
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from parameters import default_parameters
+from interaction import simulate_city_day, compute_city_kpis, summarize_city_results
+from yearCalendar import build_calendar, day_type_labels, day_seed
+from sketches import TDigest
+from streams import RandomStreams
+
+class CityDay:
+    """Order-level state for one city-day while it moves through the pipeline"""
+
+    def __init__(self, city_name, day, scenario_type):
+        self.city_name = city_name
+        self.day = day
+        self.scenario_type = scenario_type
+        self.zones = []
+        self.total_city_orders = 0
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def day_stream(cities, start_year, years):
+    """Yield (city, date, scenario) for every calendar day of the horizon"""
+    for year in range(start_year, start_year + years):
+        days = build_calendar(year)
+        for city_name in cities:
+            for day, scenario_type in days:
+                yield city_name, day, scenario_type
+
+def simulate_stage(days, seed=0, params=None, common_random_numbers=False, profile=None):
+    """Build the world, generate, fulfil and assign each day's orders (interaction.simulate_city_day)
+
+    Each day is seeded from (seed, city, date) like yearCalendar: through the
+    global random module, or with common_random_numbers through the day's own
+    RandomStreams. Stores are restocked overnight, so each day starts at par.
+    """
+    params = params or default_parameters
+    for city_name, day, scenario_type in days:
+        streams = None
+        if common_random_numbers:
+            streams = RandomStreams(day_seed(seed, city_name, day))
+        else:
+            random.seed(day_seed(seed, city_name, day))
+        state = CityDay(city_name, day, scenario_type)
+        state.zones, state.total_city_orders = simulate_city_day(
+            city_name, scenario_type, params=params, streams=streams, profile=profile
+        )
+        yield state
+
+def kpi_stage(states, params=None, event_log=None):
+    """Reduce each day to its KPI record and drop all order-level state"""
+    for state in states:
+        if event_log is not None:
+            event_log.log_zones(state.zones, state.city_name, state.scenario_type, state.day.isoformat())
+        city_digest = TDigest()
+        results = compute_city_kpis(state.zones, state.total_city_orders, params, city_digest)
+        # Nothing below this point references zones, customers or orders
+        state.zones = None
+        results = pd.DataFrame(results).T
+        results.attrs["delivery_digest"] = city_digest
+        yield {
+            "city": state.city_name,
+            "date": state.day,
+            "scenario": state.scenario_type,
+            "day_type": day_type_labels[state.scenario_type],
+            **summarize_city_results(results),
+            "delivery_digest": city_digest
+        }
+
+class RunningTotals:
+    """Constant-memory per (city, year, day type) aggregates of daily KPI records"""
+
+    summed = ["Total Orders", "Assigned Orders", "Unassigned Orders", "SLA <10 mins", "On-Demand Riders",
+              "Partial Orders", "Stockout Orders"]
+    averaged = ["Avg OPH", "Rider Utilization", "Cost/Delivery", "Fill Rate %"]
+
+    def __init__(self):
+        self.totals = {}
+        self.digests = {}
+
+    def add(self, record):
+        """Fold one record in; its delivery digest (if any) is merged and removed"""
+        key = (record["city"], record["date"].year, record["day_type"])
+        totals = self.totals.setdefault(key, dict.fromkeys(["Days"] + self.summed + self.averaged, 0))
+        totals["Days"] += 1
+        for column in self.summed + self.averaged:
+            totals[column] += record[column]
+        digest = record.pop("delivery_digest", None)
+        if digest is not None:
+            self.digests.setdefault(key, TDigest()).merge(digest)
+
+    def report(self):
+        rows = {}
+        for key, totals in self.totals.items():
+            row = {column: totals[column] for column in ["Days"] + self.summed}
+            for column in self.averaged:
+                row[column] = totals[column] / totals["Days"]
+            row["Assignment Rate"] = (totals["Assigned Orders"] / totals["Total Orders"] * 100
+                                      if totals["Total Orders"] > 0 else 0)
+            row.update(self.digests.get(key, TDigest()).percentiles())
+            rows[key] = row
+        report = pd.DataFrame(rows).T
+        report.index.names = ["city", "year", "day_type"]
+        return report.sort_index()
+
+def aggregate_stage(records, totals, memory_budget_mb=None):
+    """Fold records into running totals, enforcing the memory budget as we go"""
+    for record in records:
+        totals.add(record)
+        if memory_budget_mb is not None:
+            peak = peak_rss_mb()
+            if peak is not None and peak > memory_budget_mb:
+                raise MemoryError(f"Peak RSS {peak:.0f} MB exceeded budget of {memory_budget_mb} MB")
+        yield record
+
+def stream_daily_kpis(cities, start_year, years=1, seed=0, params=None, totals=None,
+                      memory_budget_mb=None, event_log=None, common_random_numbers=False, profile=None):
+    """simulate -> KPI -> aggregate, yielding one KPI record per city-day
+
+    Only one city-day of zones and orders is alive at any time, so memory
+    stays flat however long the horizon is. A RunProfile accumulates the
+    phases of every day.
+    """
+    totals = totals if totals is not None else RunningTotals()
+    days = day_stream(cities, start_year, years)
+    states = simulate_stage(days, seed, params, common_random_numbers, profile)
+    records = kpi_stage(states, params, event_log)
+    return aggregate_stage(records, totals, memory_budget_mb)
+
+def run_pipeline(cities, start_year, years=1, seed=0, params=None, memory_budget_mb=None,
+                 on_record=None, event_log=None, common_random_numbers=False, profile=None):
+    """Drain the pipeline and return (yearly report, peak RSS in MB)
+
+    on_record is called with every daily record (e.g. to append it to a file);
+    records are not kept otherwise. An OrderEventLog receives every order
+    before its day is dropped.
+    """
+    totals = RunningTotals()
+    for record in stream_daily_kpis(cities, start_year, years, seed, params, totals,
+                                    memory_budget_mb, event_log, common_random_numbers, profile):
+        if on_record is not None:
+            on_record(record)
+    return totals.report(), peak_rss_mb()
@@ -0,0 +1,74 @@
+import numpy as np
+
+class Ragged:
+    """Ragged int rows in CSR form: offsets (rows + 1, int64) and a flat int32 values array
+
+    Row i is values[offsets[i]:offsets[i + 1]]. Used for wishlists (one row per
+    customer) and baskets (one row per order) instead of a Python list each.
+    """
+
+    def __init__(self, offsets, values):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.int32)
+
+    @classmethod
+    def from_lengths(cls, lengths, values):
+        lengths = np.asarray(lengths, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(offsets, values)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def row(self, i):
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def row_ids(self):
+        """Row index of every value (the CSR -> COO expansion)"""
+        return np.repeat(np.arange(len(self)), self.lengths())
+
+    def value_index(self, rows):
+        """Positions in values of every value of the given rows, row by row"""
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths()[rows]
+        position = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(self.offsets[rows], lengths) + position
+
+    def duplicate_rows(self):
+        """Whether each row holds some value more than once"""
+        row_ids = self.row_ids()
+        order = np.lexsort((self.values, row_ids))
+        sorted_rows = row_ids[order]
+        sorted_values = self.values[order]
+        repeated = (sorted_rows[1:] == sorted_rows[:-1]) & (sorted_values[1:] == sorted_values[:-1])
+        flags = np.zeros(len(self), dtype=bool)
+        flags[sorted_rows[1:][repeated]] = True
+        return flags
+
+    def sample_rows(self, rows, counts, rng=None, uniforms=None):
+        """Draw counts[k] values without replacement from row rows[k], for all k at once
+
+        Every value of the selected rows gets a random key (from rng, or the
+        given uniforms, one per value of the selected rows); sorting by
+        (row, key) shuffles each row independently and the first counts[k]
+        values of each shuffled row are kept. Returns a Ragged with one row per k.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = np.minimum(np.asarray(counts, dtype=np.int64), self.lengths()[rows])
+        lengths = self.lengths()[rows]
+        segment = np.repeat(np.arange(len(rows)), lengths)
+        position = np.arange(len(segment)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        source = np.repeat(self.offsets[rows], lengths) + position
+        if uniforms is None:
+            uniforms = rng.random(len(segment))
+        shuffled = source[np.lexsort((uniforms, segment))]
+        keep = position < np.repeat(counts, lengths)
+        return Ragged.from_lengths(counts, self.values[shuffled[keep]])
@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import heapq
+import math
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from parameters import default_parameters
+
+# Synthetic street grid for the "road_grid" delivery model. A zone's disc is
+# covered by square cells of road_grid_cell_km with the dark store in the
+# centre cell. Every road_grid_arterial_every-th row and column of cells is an
+# arterial ridden at arterial_speed_kmph; side streets run at rider_speed_kmph
+# with a random lognormal slowdown per cell. Dijkstra from the dark store gives
+# the ride minutes to every cell once, so locating an order is a table lookup.
+
+def cell_minutes(cells, cell_km, rng, params=None):
+    """Minutes to ride across each cell of a cells x cells grid"""
+    params = params or default_parameters
+    index = np.arange(cells) - cells // 2
+    arterial = index % params["road_grid_arterial_every"] == 0
+    on_arterial = arterial[:, None] | arterial[None, :]
+    slowdown = rng.lognormal(0.0, params["road_grid_slowdown_sigma"], (cells, cells))
+    speed = np.where(on_arterial, params["arterial_speed_kmph"], params["rider_speed_kmph"] / slowdown)
+    return cell_km / speed * 60
+
+def shortest_minutes(crossing_minutes, source):
+    """Dijkstra over the 4-connected cell grid from source (row, col)
+
+    Moving between neighbouring cell centres costs half of each cell's crossing time.
+    """
+    rows, cols = crossing_minutes.shape
+    half = (crossing_minutes / 2).tolist()
+    best = [[math.inf] * cols for _ in range(rows)]
+    r, c = source
+    best[r][c] = 0.0
+    heap = [(0.0, r, c)]
+    while heap:
+        minutes, r, c = heapq.heappop(heap)
+        if minutes > best[r][c]:
+            continue
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < rows and 0 <= nc < cols:
+                candidate = minutes + half[r][c] + half[nr][nc]
+                if candidate < best[nr][nc]:
+                    best[nr][nc] = candidate
+                    heapq.heappush(heap, (candidate, nr, nc))
+    return np.array(best)
+
+class RoadGridTable:
+    """Ride minutes from the dark store to every grid cell, for each street grid variant
+
+    minutes[v, row, col] may be a read-only memory map (see road_grid_table).
+    """
+
+    def __init__(self, minutes, cell_km):
+        self.minutes = minutes
+        self.cell_km = cell_km
+        self.variants, self.cells, _ = minutes.shape
+
+    @classmethod
+    def build(cls, radius_km, params=None):
+        params = params or default_parameters
+        cell_km = params["road_grid_cell_km"]
+        # Odd number of cells so the dark store (origin) sits in the centre cell
+        cells = 2 * math.ceil(radius_km / cell_km) + 1
+        rng = np.random.default_rng(params["road_grid_seed"])
+        minutes = np.stack([
+            shortest_minutes(cell_minutes(cells, cell_km, rng, params), (cells // 2, cells // 2))
+            for _ in range(params["road_grid_variants"])
+        ]).astype(np.float32)
+        return cls(minutes, cell_km)
+
+    def lookup(self, variants, xy):
+        """Ride minutes for customer coordinates xy (km, n x 2) on their zones' grid variants"""
+        cells = np.rint(np.asarray(xy) / self.cell_km).astype(np.int64) + self.cells // 2
+        np.clip(cells, 0, self.cells - 1, out=cells)
+        return self.minutes[variants, cells[:, 1], cells[:, 0]]
+
+def road_grid_table(radius_km, params=None):
+    """The (cached) road grid table for zones of radius_km
+
+    With road_grid_cache set the table is saved there as .npy on first use and
+    memory-mapped afterwards, so repeated runs and pool workers share one copy.
+    """
+    params = params or default_parameters
+    settings = tuple(params[key] for key in road_grid_settings)
+    return _cached_table(round(radius_km, 6), settings, params["road_grid_cache"])
+
+road_grid_settings = ("road_grid_cell_km", "road_grid_variants", "road_grid_arterial_every",
+                      "road_grid_slowdown_sigma", "road_grid_seed", "rider_speed_kmph", "arterial_speed_kmph")
+
+@lru_cache(maxsize=8)
+def _cached_table(radius_km, settings, cache_dir):
+    params = dict(default_parameters, **dict(zip(road_grid_settings, settings)))
+    if not cache_dir:
+        return RoadGridTable.build(radius_km, params)
+    key = hashlib.sha1(repr((radius_km, settings)).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"road_grid_{key}.npy")
+    if not os.path.exists(path):
+        table = RoadGridTable.build(radius_km, params)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under a temporary name, so concurrent builders never map a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, table.minutes)
+        os.replace(temporary, path)
+    return RoadGridTable(np.load(path, mmap_mode="r"), params["road_grid_cell_km"])
+
+def attach_road_grids(zones, radius_km, params=None):
+    """Give every zone the city's road grid table and its street grid variant"""
+    table = road_grid_table(radius_km, params)
+    for i, zone in enumerate(zones):
+        zone.road_grid = table
+        zone.road_grid_variant = i % table.variants
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time road grid table builds and per-order lookups")
+    parser.add_argument("--radius", type=float, default=3.0, help="zone radius in km")
+    parser.add_argument("--orders", type=int, default=10_000_000)
+    parser.add_argument("--cache", default=None, help="directory for the memory-mapped table")
+    args = parser.parse_args()
+
+    params = dict(default_parameters, road_grid_cache=args.cache)
+    start = time.perf_counter()
+    table = road_grid_table(args.radius, params)
+    print(f"Table: {table.variants} grids of {table.cells}x{table.cells} cells in "
+          f"{time.perf_counter() - start:.3f}s")
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(-args.radius, args.radius, (args.orders, 2))
+    variants = rng.integers(0, table.variants, args.orders)
+    start = time.perf_counter()
+    minutes = table.lookup(variants, xy)
+    elapsed = time.perf_counter() - start
+    print(f"Lookup: {args.orders:,} orders in {elapsed:.3f}s ({args.orders / elapsed:,.0f} orders/s), "
+          f"mean ride {minutes.mean():.1f} min")
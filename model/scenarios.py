@@ -0,0 +1,116 @@
+import numpy as np
+
+from parameters import default_parameters, load_scenario_file, scenario_override_keys
+
+class ScenarioSpec:
+    """Scenario behaviour resolved for one (scenario, time slot), read by the hot loops"""
+
+    def __init__(self, scenario_id, name, volume_multiplier, base_probability, wallet_always_orders,
+                 order_acceptance, wishlist_probability, wishlist_items, catalog_items,
+                 scheduled_probability, delivery_multiplier):
+        self.id = scenario_id
+        self.name = name
+        self.volume_multiplier = volume_multiplier
+        self.base_probability = base_probability
+        self.wallet_always_orders = wallet_always_orders  # Wallet users always pass the acceptance check
+        self.order_acceptance = order_acceptance
+        self.wishlist_probability = wishlist_probability
+        self.wishlist_items = wishlist_items  # (min, max) items picked from the wishlist
+        self.catalog_items = catalog_items  # (min, max) catalog SKUs otherwise
+        self.scheduled_probability = scheduled_probability
+        self.delivery_multiplier = delivery_multiplier
+
+class ScenarioTable:
+    """Scenario definitions compiled into arrays indexed by integer scenario id
+
+    Each scenario in the file sets volume_multiplier, base_probability,
+    wallet_always_orders, order_acceptance, wishlist_probability,
+    wishlist_items, catalog_items, scheduled_probability and
+    delivery_multiplier. A scenario may also list time_slots with a
+    probability_multiplier / delivery_multiplier each; outside those slots
+    its base probability comes from its off_slot scenario, as does its volume
+    when some other slot is named. Volume, base probability and the slot
+    multipliers can be overridden per run through params.
+    """
+
+    def __init__(self, definitions, params=None):
+        params = params or default_parameters
+        self.definitions = definitions
+        self.names = list(definitions)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        specs = list(definitions.values())
+        for overrides in (params["scenario_multipliers"], params["base_probabilities"]):
+            for name in overrides:
+                self.scenario_id(name)
+        self.slot_probability_multipliers = params["slot_probability_multipliers"]
+        self.slot_delivery_multipliers = params["slot_delivery_multipliers"]
+        for overrides in (self.slot_probability_multipliers, self.slot_delivery_multipliers):
+            for key in overrides:
+                name, _, slot = key.partition(":")
+                self.scenario_id(name)
+                if slot not in (definitions[name].get("time_slots") or {}):
+                    raise ValueError(f"Unknown time slot: {key}")
+        self.volume_multiplier = np.array([params["scenario_multipliers"].get(name, spec["volume_multiplier"])
+                                           for name, spec in definitions.items()])
+        self.base_probability = np.array([params["base_probabilities"].get(name, spec["base_probability"])
+                                          for name, spec in definitions.items()])
+        self.wallet_always_orders = np.array([spec["wallet_always_orders"] for spec in specs])
+        self.order_acceptance = np.array([spec["order_acceptance"] for spec in specs])
+        self.wishlist_probability = np.array([spec["wishlist_probability"] for spec in specs])
+        self.wishlist_items = np.array([spec["wishlist_items"] for spec in specs], dtype=np.int64)
+        self.catalog_items = np.array([spec["catalog_items"] for spec in specs], dtype=np.int64)
+        self.scheduled_probability = np.array([spec["scheduled_probability"] for spec in specs])
+        self.delivery_multiplier = np.array([spec["delivery_multiplier"] for spec in specs])
+        self._resolved = {}
+
+    def scenario_id(self, scenario_type):
+        if scenario_type not in self.ids:
+            raise ValueError(f"Unknown scenario: {scenario_type}")
+        return self.ids[scenario_type]
+
+    def resolve(self, scenario_type, time_slot=None):
+        """ScenarioSpec for a scenario and optional time slot (cached)"""
+        key = (scenario_type, time_slot)
+        if key not in self._resolved:
+            self._resolved[key] = self._resolve(scenario_type, time_slot)
+        return self._resolved[key]
+
+    def _resolve(self, scenario_type, time_slot):
+        i = self.scenario_id(scenario_type)
+        volume_multiplier = float(self.volume_multiplier[i])
+        base_probability = float(self.base_probability[i])
+        delivery_multiplier = float(self.delivery_multiplier[i])
+        slots = self.definitions[scenario_type].get("time_slots")
+        if slots:
+            if time_slot in slots:
+                key = f"{scenario_type}:{time_slot}"
+                base_probability *= self.slot_probability_multipliers.get(
+                    key, slots[time_slot].get("probability_multiplier", 1.0))
+                delivery_multiplier = self.slot_delivery_multipliers.get(
+                    key, slots[time_slot].get("delivery_multiplier", delivery_multiplier))
+            else:
+                off_slot = self.scenario_id(self.definitions[scenario_type].get("off_slot", scenario_type))
+                base_probability = float(self.base_probability[off_slot])
+                if time_slot:
+                    volume_multiplier = float(self.volume_multiplier[off_slot])
+        return ScenarioSpec(
+            i, scenario_type, volume_multiplier, base_probability,
+            bool(self.wallet_always_orders[i]), float(self.order_acceptance[i]),
+            float(self.wishlist_probability[i]), tuple(self.wishlist_items[i].tolist()),
+            tuple(self.catalog_items[i].tolist()), float(self.scheduled_probability[i]),
+            delivery_multiplier
+        )
+
+_tables = {}
+
+def compile_scenarios(params=None):
+    """The ScenarioTable for a parameter set, compiled once per distinct file/overrides"""
+    params = params or default_parameters
+    key = (params["scenario_file"], *(tuple(params[name].items()) for name in scenario_override_keys))
+    if key not in _tables:
+        _tables[key] = ScenarioTable(load_scenario_file(params["scenario_file"]), params)
+    return _tables[key]
+
+def resolve_scenario(scenario_type, time_slot=None, params=None):
+    """Shortcut for compile_scenarios(params).resolve(scenario_type, time_slot)"""
+    return compile_scenarios(params).resolve(scenario_type, time_slot)
@@ -0,0 +1,179 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from parameters import default_parameters, flatten_parameters
+from scenarios import compile_scenarios
+from sweep import scale_unit_samples, run_sweep
+
+# KPIs we rank inputs against (columns of summarize_city_results)
+sensitivity_outputs = ["Unassigned Orders", "SLA <10 mins", "Cost/Delivery"]
+
+def default_space(scenario_type, time_slot=None, spread=0.3):
+    """Input ranges around the defaults: traffic factors, scenario knobs and rider caps
+
+    The scenario knobs are the ones that act in time_slot: the off-slot
+    scenario's outside the scenario's time slots, plus the slot multipliers
+    inside one.
+    """
+    flat = flatten_parameters(default_parameters)
+    space = {}
+    for level in default_parameters["traffic_base_factors"]:
+        value = flat[f"traffic_base_factors.{level}"]
+        space[f"traffic_base_factors.{level}"] = (value * (1 - spread), value * (1 + spread))
+    table = compile_scenarios()
+    table.scenario_id(scenario_type)
+    definition = table.definitions[scenario_type]
+    slots = definition.get("time_slots") or {}
+    volume_source = probability_source = scenario_type
+    if slots and time_slot not in slots:
+        probability_source = definition.get("off_slot", scenario_type)
+        if time_slot:
+            volume_source = probability_source
+    knobs = [(f"scenario_multipliers.{volume_source}", table.volume_multiplier[table.scenario_id(volume_source)]),
+             (f"base_probabilities.{probability_source}",
+              table.base_probability[table.scenario_id(probability_source)])]
+    if time_slot in slots:
+        spec = table.resolve(scenario_type, time_slot)
+        knobs += [(f"slot_probability_multipliers.{scenario_type}:{time_slot}",
+                   slots[time_slot].get("probability_multiplier", 1.0)),
+                  (f"slot_delivery_multipliers.{scenario_type}:{time_slot}", spec.delivery_multiplier)]
+    for key, value in knobs:
+        value = float(value)
+        space[key] = (value * (1 - spread), value * (1 + spread))
+    space["max_orders_per_rider"] = (10, 30)
+    space["fixed_riders_per_city"] = (10, 30)
+    space["on_demand_order_threshold"] = (150, 450)
+    return space
+
+def _evaluate(points, city_name, scenario_type, time_slot, replications, seed, workers):
+    """Evaluate all points in one batched sweep and return (num_points, num_outputs) means"""
+    workers = workers or os.cpu_count() or 1
+    # Thousands of ~10ms tasks: hand them out in chunks to keep IPC off the critical path
+    num_tasks = len(points) * replications
+    chunksize = max(1, num_tasks // (workers * 8))
+    scenario = (scenario_type, time_slot) if time_slot else scenario_type
+    table = run_sweep(points, [city_name], [scenario], replications=replications, seed=seed,
+                      workers=workers, chunksize=chunksize)
+    means = table.groupby("point")[sensitivity_outputs].mean().sort_index()
+    return means.to_numpy(dtype=float)
+
+def morris_trajectories(num_factors, num_trajectories, num_levels=4, seed=None):
+    """Generate Morris one-at-a-time trajectories in the unit cube
+
+    Returns (points, steps, deltas): points has shape (r, k + 1, k), steps[t, s]
+    is the factor moved between point s and s + 1 of trajectory t and
+    deltas[t, j] is the signed step applied to factor j.
+    """
+    rng = np.random.default_rng(seed)
+    r, k = num_trajectories, num_factors
+    delta = num_levels / (2 * (num_levels - 1))
+    levels = np.arange(num_levels) / (num_levels - 1)
+    start = rng.choice(levels[levels <= 1 - delta + 1e-12], size=(r, k))
+    # Move up when there is room, otherwise down; factor order is a random permutation
+    signs = np.where(rng.random((r, k)) < 0.5, 1.0, -1.0)
+    signs = np.where(start + delta > 1 + 1e-12, -1.0, signs)
+    signs = np.where(start - delta < -1e-12, 1.0, signs)
+    steps = np.argsort(rng.random((r, k)), axis=1)
+
+    points = np.repeat(start[:, None, :], k + 1, axis=1)
+    rows = np.arange(r)
+    for s in range(k):
+        points[:, s + 1] = points[:, s]
+        points[rows, s + 1, steps[:, s]] += delta * signs[rows, steps[:, s]]
+    return points, steps, signs * delta
+
+def morris(city_name, scenario_type, time_slot=None, space=None, num_trajectories=20,
+           num_levels=4, replications=1, seed=0, workers=None):
+    """Morris elementary effects (mu, mu*, sigma) of each input on each KPI"""
+    space = space or default_space(scenario_type, time_slot)
+    knobs = list(space)
+    k = len(knobs)
+    unit, steps, deltas = morris_trajectories(k, num_trajectories, num_levels, seed)
+    points = scale_unit_samples(unit.reshape(-1, k), space)
+
+    outputs = _evaluate(points, city_name, scenario_type, time_slot, replications, seed, workers)
+    outputs = outputs.reshape(num_trajectories, k + 1, len(sensitivity_outputs))
+
+    # Elementary effect of the factor moved at each step, regrouped by factor
+    rows = np.arange(num_trajectories)[:, None]
+    step_deltas = deltas[rows, steps]
+    effects_by_step = np.diff(outputs, axis=1) / step_deltas[:, :, None]
+    effects = np.empty_like(effects_by_step)
+    effects[rows, steps] = effects_by_step
+
+    frames = {}
+    for o, output in enumerate(sensitivity_outputs):
+        ee = effects[:, :, o]
+        frames[output] = pd.DataFrame({
+            "mu": ee.mean(axis=0),
+            "mu_star": np.abs(ee).mean(axis=0),
+            "sigma": ee.std(axis=0, ddof=1) if num_trajectories > 1 else np.zeros(k)
+        }, index=knobs).sort_values("mu_star", ascending=False)
+    return frames
+
+def saltelli_matrices(num_factors, num_samples, seed=None):
+    """Sample matrices A, B and the k hybrid matrices AB_i (column i taken from B)"""
+    rng = np.random.default_rng(seed)
+    a = rng.random((num_samples, num_factors))
+    b = rng.random((num_samples, num_factors))
+    ab = np.repeat(a[None, :, :], num_factors, axis=0)
+    idx = np.arange(num_factors)
+    ab[idx, :, idx] = b.T
+    return a, b, ab
+
+def sobol_indices(f_a, f_b, f_ab):
+    """First-order (Saltelli 2010) and total (Jansen) indices
+
+    f_a, f_b have shape (N,) and f_ab has shape (k, N); returns (S1, ST) of shape (k,).
+    """
+    variance = np.var(np.concatenate([f_a, f_b]), ddof=1)
+    if variance == 0:
+        zeros = np.zeros(f_ab.shape[0])
+        return zeros, zeros
+    first = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+    total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+    return first, total
+
+def sobol(city_name, scenario_type, time_slot=None, space=None, num_samples=256,
+          replications=1, seed=0, workers=None, num_resamples=200):
+    """Sobol first-order and total indices with bootstrap 95% CIs
+
+    Costs num_samples * (k + 2) * replications simulations.
+    """
+    space = space or default_space(scenario_type, time_slot)
+    knobs = list(space)
+    k = len(knobs)
+    a, b, ab = saltelli_matrices(k, num_samples, seed)
+    unit = np.concatenate([a, b, ab.reshape(-1, k)])
+    points = scale_unit_samples(unit, space)
+
+    outputs = _evaluate(points, city_name, scenario_type, time_slot, replications, seed, workers)
+    f_a = outputs[:num_samples]
+    f_b = outputs[num_samples:2 * num_samples]
+    f_ab = outputs[2 * num_samples:].reshape(k, num_samples, -1)
+
+    rng = np.random.default_rng(None if seed is None else seed + 1)
+    resamples = rng.integers(0, num_samples, size=(num_resamples, num_samples))
+
+    frames = {}
+    for o, output in enumerate(sensitivity_outputs):
+        first, total = sobol_indices(f_a[:, o], f_b[:, o], f_ab[:, :, o])
+        boot = [sobol_indices(f_a[idx, o], f_b[idx, o], f_ab[:, idx, o]) for idx in resamples]
+        boot_first = np.array([s1 for s1, _ in boot])
+        boot_total = np.array([st for _, st in boot])
+        frames[output] = pd.DataFrame({
+            "S1": first,
+            "S1_conf": 1.96 * boot_first.std(axis=0),
+            "ST": total,
+            "ST_conf": 1.96 * boot_total.std(axis=0)
+        }, index=knobs).sort_values("ST", ascending=False)
+    return frames
+
+def rank_inputs(frames, metric="mu_star"):
+    """One table of input ranks (1 = most influential) per KPI"""
+    return pd.DataFrame({
+        output: frame[metric].rank(ascending=False, method="min").astype(int)
+        for output, frame in frames.items()
+    }).sort_values(sensitivity_outputs[0])
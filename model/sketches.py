@@ -0,0 +1,97 @@
+import numpy as np
+
+class TDigest:
+    """Mergeable streaming quantile sketch (merging t-digest, k1 scale function)
+
+    Values are buffered and folded into about compression / 2 centroids in one
+    vectorized pass, so delivery times never have to be stored. Digests built
+    in different workers or replications combine with merge().
+    """
+
+    def __init__(self, compression=200, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or 10 * compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    def update(self, values):
+        """Add a batch of values"""
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return self
+        self._buffer.append(values)
+        self._buffered += len(values)
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self._buffered >= self.buffer_size:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another digest into this one"""
+        other._compress()
+        if other.count == 0:
+            return self
+        self._compress()
+        self._fold(other.means, other.weights)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._fold(values, np.ones(len(values)))
+
+    def _fold(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # Points whose cumulative-weight midpoint falls in the same unit of the
+        # k1 scale share a centroid: tiny centroids in the tails, large ones mid-way
+        total = weights.sum()
+        midpoints = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * midpoints - 1)
+        buckets = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(weights * means, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q):
+        """Estimated quantile(s) for q in [0, 1]"""
+        self._compress()
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.r_[0.0, centers, self.count]
+        values = np.r_[self.min, self.means, self.max]
+        result = np.interp(q * self.count, positions, values)
+        return result if q.ndim else float(result)
+
+    def percentiles(self, levels=(50, 90, 99)):
+        """{"p50 Delivery": ..., ...} rounded for KPI tables"""
+        values = self.quantile(np.asarray(levels) / 100)
+        return {f"p{level} Delivery": round(float(value), 2) if self.count else 0
+                for level, value in zip(levels, np.atleast_1d(values))}
+
+def merge_digests(digests, compression=200):
+    """Merge digests from workers or replications into a new one"""
+    merged = TDigest(compression)
+    for digest in digests:
+        if digest is not None:
+            merged.merge(digest)
+    return merged
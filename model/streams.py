@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+
+class StreamRandom(random.Random):
+    """random.Random whose integer draws are monotone in the underlying uniform
+
+    Keeping randint/choice monotone in random() means an antithetic stream
+    (u -> 1 - u) also mirrors item counts, delivery jitter and traffic draws,
+    not just the Bernoulli order decisions.
+    """
+
+    def __init__(self, seed=None, antithetic=False):
+        self.antithetic = antithetic
+        super().__init__(seed)
+
+    def random(self):
+        u = super().random()
+        return 1.0 - u if self.antithetic else u
+
+    def randint(self, a, b):
+        span = b - a + 1
+        return a + min(int(self.random() * span), span - 1)
+
+    def choice(self, seq):
+        return seq[min(int(self.random() * len(seq)), len(seq) - 1)]
+
+class RandomStreams:
+    """Named random streams derived from one replication seed
+
+    Every (purpose, entity) key gets its own stream, e.g. ("order", customer.id),
+    so two scenarios run with the same seed see the same draws for the same
+    customer even when they consume a different number of draws elsewhere.
+    """
+
+    def __init__(self, seed, antithetic=False):
+        self.seed = seed
+        self.antithetic = antithetic
+
+    def stream(self, *key):
+        return StreamRandom(f"{self.seed}:" + ":".join(str(k) for k in key), self.antithetic)
+
+class KeyedUniforms:
+    """Counter-based uniforms for many entities at once, one 64-bit key per entity
+
+    Value j of entity k is a pure function of (keys[k], salt, j) (SplitMix64
+    finalizer), so whole-zone array draws still give each entity the same
+    numbers whatever the other entities do. Keys come from the entities'
+    own streams, e.g. streams.stream("catalog", customer.id).getrandbits(64).
+    """
+
+    def __init__(self, keys, antithetic=False):
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.antithetic = antithetic
+
+    def uniforms(self, lengths, salt=0, entities=None):
+        """lengths[k] uniforms in [0, 1) for each entity (or each of entities), entity by entity"""
+        keys = self.keys if entities is None else self.keys[entities]
+        lengths = np.asarray(lengths, dtype=np.int64)
+        position = np.arange(lengths.sum(), dtype=np.uint64)
+        position -= np.repeat(np.cumsum(lengths) - lengths, lengths).astype(np.uint64)
+        z = np.repeat(keys, lengths) + (position + np.uint64((salt << 32) + 1)) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        u = (z ^ (z >> np.uint64(31))) >> np.uint64(11)
+        u = u.astype(np.float64) * 2.0 ** -53
+        return 1.0 - u if self.antithetic else u
+
+def stream_for(streams, *key):
+    """Stream for key when running with common random numbers, else the global random module"""
+    return streams.stream(*key) if streams is not None else random
@@ -0,0 +1,160 @@
+import importlib.util
+import itertools
+import os
+import random
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from parameters import resolve_parameters
+from interaction import run_simulation, summarize_city_results
+from tracing import span, pool_options
+
+MODEL2_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model2", "model.py")
+
+# Knobs understood by the model2 engine (constructor arguments of FlipkartRiderSimulation)
+model2_knobs = ["orders_per_fixed_rider", "max_orders_per_day"]
+
+def grid(space):
+    """Full factorial grid: {knob: [values]} -> list of override dicts"""
+    knobs = list(space)
+    return [dict(zip(knobs, values)) for values in itertools.product(*(space[k] for k in knobs))]
+
+def scale_unit_samples(unit, space):
+    """Map an (n, k) array in [0, 1] onto {knob: (low, high)} -> list of override dicts
+
+    Knobs whose bounds are both ints (rider caps, fleet sizes) are rounded.
+    """
+    knobs = list(space)
+    low = np.array([space[k][0] for k in knobs], dtype=float)
+    high = np.array([space[k][1] for k in knobs], dtype=float)
+    samples = low + unit * (high - low)
+    columns = []
+    for j, knob in enumerate(knobs):
+        if all(isinstance(bound, int) for bound in space[knob]):
+            columns.append(np.rint(samples[:, j]).astype(int).tolist())
+        else:
+            columns.append(samples[:, j].tolist())
+    return [dict(zip(knobs, values)) for values in zip(*columns)]
+
+def latin_hypercube(space, num_points, seed=None):
+    """Latin-hypercube sample: {knob: (low, high)} -> list of override dicts"""
+    rng = np.random.default_rng(seed)
+    # One stratum per point and knob, shuffled independently per column
+    strata = np.argsort(rng.random((num_points, len(space))), axis=0)
+    unit = (strata + rng.random((num_points, len(space)))) / num_points
+    return scale_unit_samples(unit, space)
+
+def _load_model2():
+    """Import model2/model.py under its own name (it clashes with model/model.py)"""
+    module = sys.modules.get("model2_model")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("model2_model", MODEL2_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules["model2_model"] = module
+    return module
+
+def evaluate_model(overrides, city_name, scenario_type, time_slot=None, seed=None):
+    """Run one model simulation with parameter overrides and return the city summary"""
+    params = resolve_parameters(overrides)
+    if seed is not None:
+        random.seed(seed)
+    return summarize_city_results(run_simulation(city_name, scenario_type, time_slot, params))
+
+def evaluate_model2(overrides, city_name, scenario_name, time_slot=None, seed=None):
+    """Run one model2 scenario for a city with constructor overrides and return day averages"""
+    model2 = _load_model2()
+    unknown = set(overrides) - set(model2_knobs)
+    if unknown:
+        raise ValueError(f"Unknown model2 parameters: {sorted(unknown)}")
+    sim = model2.FlipkartRiderSimulation(model2.city_metadata, **overrides)
+    hourly = list(sim.hourly_metrics(scenario_name, city_name))
+    return {
+        "Total Orders": sum(orders for _, _, orders, _ in hourly),
+        "Adhoc Riders": sum(m['adhoc_riders_used'] for _, _, _, m in hourly),
+        "Avg OPH": sum(m['OPH'] for _, _, _, m in hourly) / len(hourly),
+        "Fixed Utilization": sum(m['fixed_utilization'] for _, _, _, m in hourly) / len(hourly)
+    }
+
+engines = {
+    "model": evaluate_model,
+    "model2": evaluate_model2
+}
+
+def _run_task(task):
+    point_id, overrides, engine, city_name, scenario, time_slot, replication, seed = task
+    with span(f"point {point_id} {city_name} {scenario}", "task", engine=engine, replication=replication):
+        kpis = engines[engine](overrides, city_name, scenario, time_slot, seed)
+    return {
+        "point": point_id,
+        **overrides,
+        "city": city_name,
+        "scenario": scenario,
+        "time_slot": time_slot,
+        "replication": replication,
+        "seed": seed,
+        **kpis
+    }
+
+def build_tasks(points, cities, scenarios, engine="model", replications=1, seed=0):
+    """Expand points x cities x scenarios x replications into evaluation tasks
+
+    Scenarios are either plain names or (scenario, time_slot) tuples. Seeds are
+    derived from the replication index only, so every point sees the same draws.
+    """
+    tasks = []
+    for point_id, overrides in enumerate(points):
+        for city_name in cities:
+            for scenario in scenarios:
+                scenario_type, time_slot = scenario if isinstance(scenario, tuple) else (scenario, None)
+                for replication in range(replications):
+                    run_seed = None if seed is None else seed + replication
+                    tasks.append((point_id, overrides, engine, city_name, scenario_type,
+                                  time_slot, replication, run_seed))
+    return tasks
+
+def run_sweep(points, cities, scenarios, engine="model", replications=1, seed=0,
+              workers=None, output=None, chunksize=1):
+    """Evaluate every sweep task on a process pool and return one tidy DataFrame
+
+    Tasks are handed out one at a time by default (imap_unordered, chunksize=1)
+    so slow cities or scenarios don't hold up a whole chunk; raise chunksize for
+    thousands of tiny tasks. Rows are appended column by column as they arrive.
+    ``output`` may end in .csv or .parquet.
+    """
+    tasks = build_tasks(points, cities, scenarios, engine, replications, seed)
+    columns = {}
+
+    def collect(row, row_index):
+        for key, value in row.items():
+            if key not in columns:
+                columns[key] = [None] * row_index
+            columns[key].append(value)
+        for key, values in columns.items():
+            if len(values) == row_index:
+                values.append(None)
+
+    if workers == 1:
+        rows = map(_run_task, tasks)
+        for row_index, row in enumerate(rows):
+            collect(row, row_index)
+    else:
+        with Pool(processes=workers, **pool_options()) as pool:
+            for row_index, row in enumerate(pool.imap_unordered(_run_task, tasks, chunksize=chunksize)):
+                collect(row, row_index)
+
+    table = pd.DataFrame(columns)
+    if len(table):
+        table = table.sort_values(["point", "city", "scenario", "replication"], kind="stable")
+        table = table.reset_index(drop=True)
+
+    if output:
+        if output.endswith(".parquet"):
+            table.to_parquet(output, index=False)
+        else:
+            table.to_csv(output, index=False)
+
+    return table
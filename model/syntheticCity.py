@@ -0,0 +1,164 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from cityProfiles import (
+    city_metadata, dark_store_area, order_rate_columns, validate_city_registry,
+    model_city_metadata, model2_city_metadata
+)
+from catalog import get_catalog, numpy_rng
+from definitions import Zone, Customer, Rider
+from parameters import default_parameters
+from ragged import Ragged
+
+traffic_levels = ["low", "moderate", "high"]
+# model2's single traffic factor per city is the customer-weighted mean of these
+model2_traffic_factors = np.array([1, 3, 5])
+# model2 hourly order rates relative to BAU peak hours (see model2's menu)
+model2_rate_multipliers = {"BAU": 1.0, "peakday": 1.22, "monthpeak": 1.45, "yearpeak": 3.0}
+model2_non_peak_ratio = 0.92
+
+class SyntheticCity:
+    """A synthetic city of any size: per-zone customers, traffic level and riders as arrays
+
+        city = SyntheticCity("Mega", num_zones=5_000, num_customers=20_000_000)
+        city.register()                       # create_zones_from_city("Mega") now works
+        for chunk in city.world_chunks(rng):  # or stream columnar customer chunks
+            ...
+
+    Customers are spread over zones by lognormal density weights
+    (density_sigma=0 for equal zones), traffic levels follow traffic_mix
+    (low, moderate, high shares) and each zone gets 1 + Poisson(riders_per_zone - 1)
+    fixed riders. The zone table is drawn once from seed; customers, wallets and
+    wishlists are drawn per run from the run's random stream.
+    """
+
+    def __init__(self, name, num_zones, num_customers, seed=0, density_sigma=0.6,
+                 traffic_mix=(0.3, 0.5, 0.2), riders_per_zone=5, base_delivery_time=9,
+                 orders_per_customer_hour=0.05, avg_zone_size=dark_store_area):
+        if num_zones < 1 or num_customers < num_zones:
+            raise ValueError("A synthetic city needs at least one zone and one customer per zone")
+        if riders_per_zone < 1:
+            raise ValueError("riders_per_zone must be at least 1")
+        self.name = name
+        self.num_zones = num_zones
+        self.num_customers = num_customers
+        self.base_delivery_time = base_delivery_time
+        self.orders_per_customer_hour = orders_per_customer_hour
+        self.avg_zone_size = avg_zone_size
+
+        rng = np.random.default_rng(seed)
+        weights = rng.lognormal(0.0, density_sigma, num_zones) if density_sigma > 0 else np.ones(num_zones)
+        # One customer per zone up front, the rest spread by density weight
+        self.zone_customers = 1 + rng.multinomial(num_customers - num_zones, weights / weights.sum())
+        mix = np.asarray(traffic_mix, dtype=float)
+        self.zone_traffic = rng.choice(len(traffic_levels), size=num_zones, p=mix / mix.sum()).astype(np.int8)
+        self.zone_riders = 1 + rng.poisson(riders_per_zone - 1, num_zones)
+        self.customer_offsets = np.zeros(num_zones + 1, dtype=np.int64)
+        np.cumsum(self.zone_customers, out=self.customer_offsets[1:])
+
+    def registry_row(self):
+        """The city as a city-registry row (see cityProfiles.py)"""
+        bau_peak = self.num_customers * self.orders_per_customer_hour
+        rates = {}
+        for column in order_rate_columns:
+            scenario, period = column.split("_order_per_hour_")
+            rate = bau_peak * model2_rate_multipliers[scenario]
+            rates[column] = round(rate * (model2_non_peak_ratio if period == "non_peak" else 1))
+        traffic = model2_traffic_factors[self.zone_traffic]
+        return {
+            "city": self.name,
+            "area_sq_km": self.num_zones * self.avg_zone_size,
+            "avg_zone_size": self.avg_zone_size,
+            "base_delivery_time": self.base_delivery_time,
+            "riders": int(self.zone_riders.sum()),
+            "dark_stores": self.num_zones,
+            "traffic_factor": round(float(np.average(traffic, weights=self.zone_customers)), 2),
+            **rates
+        }
+
+    def register(self):
+        """Add the city to model's city_metadata; returns its model2 city metadata entry"""
+        registry = validate_city_registry([self.registry_row()], "synthetic")
+        metadata = model_city_metadata(registry)[self.name]
+        metadata["zones"] = self.num_zones
+        metadata["synthetic"] = self
+        city_metadata[self.name] = metadata
+        return model2_city_metadata(registry)[self.name]
+
+    def unregister(self):
+        """Remove the city from city_metadata again (a registered real city of the same name stays)"""
+        if city_metadata.get(self.name, {}).get("synthetic") is self:
+            del city_metadata[self.name]
+
+    def world_chunks(self, rng, params=None, chunk_customers=1_000_000):
+        """Columnar customers for consecutive zone ranges of about chunk_customers each
+
+        Yields dicts with zone_start/zone_stop, customer offsets (relative to the
+        chunk), wallet flags and wishlists (Ragged, one row per customer). Every
+        draw is one numpy call per chunk, so memory stays bounded by the chunk.
+        """
+        catalog = get_catalog(params)
+        zone_start = 0
+        while zone_start < self.num_zones:
+            first = self.customer_offsets[zone_start]
+            zone_stop = int(np.searchsorted(self.customer_offsets, first + chunk_customers, side="right"))
+            zone_stop = min(max(zone_stop - 1, zone_start + 1), self.num_zones)
+            count = int(self.customer_offsets[zone_stop] - first)
+            # Wallet flags and wishlist sizes (1-5 items), as in create_zones_from_city
+            wallets = rng.random(count) < 0.5
+            wishlist_sizes = np.minimum(rng.integers(1, 6, count), len(catalog))
+            wishlists = catalog.sample_distinct(wishlist_sizes, rng)
+            yield {
+                "zone_start": zone_start,
+                "zone_stop": zone_stop,
+                "customer_offsets": self.customer_offsets[zone_start:zone_stop + 1] - first,
+                "wallets": wallets,
+                "wishlists": wishlists
+            }
+            zone_start = zone_stop
+
+    def create_zones(self, params=None, rng=random, chunk_customers=1_000_000):
+        """Zone objects for the simulation engines (called by create_zones_from_city)"""
+        params = params or default_parameters
+        zones = []
+        for chunk in self.world_chunks(numpy_rng(rng), params, chunk_customers):
+            offsets = chunk["customer_offsets"]
+            wishlist_offsets = chunk["wishlists"].offsets
+            for k, z in enumerate(range(chunk["zone_start"], chunk["zone_stop"])):
+                zone_name = f"Zone_{z + 1}"
+                zone = Zone(zone_name)
+                zone.traffic_level = traffic_levels[self.zone_traffic[z]]
+                a, b = offsets[k], offsets[k + 1]
+                zone.wishlists = Ragged(wishlist_offsets[a:b + 1] - wishlist_offsets[a],
+                                        chunk["wishlists"].values[wishlist_offsets[a]:wishlist_offsets[b]])
+                zone.customers = [
+                    Customer(id=f"{zone_name}_C{j}", zone=zone_name, has_wallet=has_wallet,
+                             wishlists=zone.wishlists, index=j)
+                    for j, has_wallet in enumerate(chunk["wallets"][a:b].tolist())
+                ]
+                zone.riders = [Rider(id=f"{zone_name}_R{j}", zone=zone_name, rider_type="fixed")
+                               for j in range(self.zone_riders[z])]
+                zones.append(zone)
+        return zones
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time synthetic city generation at scale")
+    parser.add_argument("--zones", type=int, default=5_000)
+    parser.add_argument("--customers", type=int, default=20_000_000)
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="customers per world chunk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    city = SyntheticCity("Synthetic", args.zones, args.customers)
+    city.register()
+    print(f"Zone table: {args.zones:,} zones in {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    wishlist_items = 0
+    for chunk in city.world_chunks(np.random.default_rng(0), chunk_customers=args.chunk):
+        wishlist_items += len(chunk["wishlists"].values)
+    elapsed = time.perf_counter() - start
+    print(f"World: {args.customers:,} customers, {wishlist_items:,} wishlist items in {elapsed:.2f}s "
+          f"({args.customers / elapsed:,.0f} customers/s)")
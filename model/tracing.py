@@ -0,0 +1,119 @@
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Chrome trace-event spans (open the output in https://ui.perfetto.dev or chrome://tracing)
+#
+#     with tracing("run.trace.json"):
+#         simulate_calendar_year(["Delhi", "Mumbai"], 2025)
+#
+# Every process appends its finished spans to its own shard file next to the
+# output; process pools started with Pool(..., **pool_options()) trace their
+# workers too. stop_tracing() merges the shards into one JSON file. While
+# tracing is off span() returns a shared no-op context.
+
+_tracer = None
+_disabled = nullcontext()
+
+class Tracer:
+    """Collects complete ("X") events for this process and flushes them to its shard"""
+
+    def __init__(self, directory, origin_ns):
+        self.directory = directory
+        self.origin_ns = origin_ns  # Wall-clock zero shared by every process of the trace
+        self.pid = os.getpid()
+        self.events = []
+        self.depth = 0
+
+    @contextmanager
+    def span(self, name, category, args):
+        start_ns = time.time_ns()
+        counter = time.perf_counter_ns()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start_ns - self.origin_ns) / 1000,
+                "dur": (time.perf_counter_ns() - counter) / 1000,
+                "pid": self.pid,
+                "tid": threading.get_native_id(),
+                "args": args
+            })
+            # Pool workers can be terminated without running exit hooks, so
+            # every outermost span goes to disk as soon as it closes
+            if self.depth == 0:
+                self.flush()
+
+    def flush(self):
+        if not self.events:
+            return
+        with open(os.path.join(self.directory, f"{self.pid}.jsonl"), "a") as f:
+            for event in self.events:
+                f.write(json.dumps(event, default=str) + "\n")
+        self.events = []
+
+def span(name, category="phase", **args):
+    """Context manager recording one span; args show up in the trace viewer's details pane"""
+    if _tracer is None:
+        return _disabled
+    return _tracer.span(name, category, args)
+
+def start_tracing(path):
+    """Start tracing this process; the merged trace is written to path by stop_tracing()"""
+    global _tracer
+    directory = path + ".parts"
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    _tracer = Tracer(directory, time.time_ns())
+    return _tracer
+
+def _start_worker(directory, origin_ns):
+    global _tracer
+    _tracer = Tracer(directory, origin_ns)
+
+def pool_options():
+    """Extra Pool() arguments that turn tracing on in worker processes ({} when off)"""
+    if _tracer is None:
+        return {}
+    return {"initializer": _start_worker, "initargs": (_tracer.directory, _tracer.origin_ns)}
+
+def stop_tracing():
+    """Merge every process's spans into the trace file and turn tracing off; returns the path"""
+    global _tracer
+    if _tracer is None:
+        return None
+    tracer, _tracer = _tracer, None
+    tracer.flush()
+    events = []
+    for shard in glob.glob(os.path.join(tracer.directory, "*.jsonl")):
+        with open(shard) as f:
+            events.extend(json.loads(line) for line in f)
+    events.sort(key=lambda event: event["ts"])
+    metadata = [
+        {"name": "process_name", "ph": "M", "pid": pid,
+         "args": {"name": "main" if pid == tracer.pid else f"worker {pid}"}}
+        for pid in sorted({event["pid"] for event in events} | {tracer.pid})
+    ]
+    path = tracer.directory[:-len(".parts")]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+    shutil.rmtree(tracer.directory, ignore_errors=True)
+    return path
+
+@contextmanager
+def tracing(path):
+    """Trace everything inside the with block to path"""
+    start_tracing(path)
+    try:
+        yield
+    finally:
+        stop_tracing()
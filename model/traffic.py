@@ -0,0 +1,50 @@
+import numpy as np
+
+from parameters import default_parameters
+from scenarios import compile_scenarios
+
+traffic_levels = ["low", "moderate", "high"]
+hours_per_day = 24
+
+# Arrival window [start, end) in hours for the peak hour time slots
+slot_hours = {
+    "morning_peak": (7, 11),
+    "evening_peak": (19, 23)
+}
+
+def congestion_curves(params=None):
+    """Hourly congestion multiplier per scenario id, shape (scenarios, 24); missing curves are flat"""
+    params = params or default_parameters
+    curves = params["traffic_hour_curves"]
+    return np.array([curves.get(scenario, [1.0] * hours_per_day)
+                     for scenario in compile_scenarios(params).names], dtype=float)
+
+class TrafficTable:
+    """Traffic factor per zone x day type (scenario) x hour, built once per city world
+
+    factors[z, d, h] = base factor of zone z's traffic level x congestion curve
+    of day type d at hour h. Lookups take arrays of zones/hours, so the
+    assignment stage gets every order's factor in one indexing operation.
+    """
+
+    def __init__(self, zone_levels, params=None):
+        params = params or default_parameters
+        self.scenarios = compile_scenarios(params)
+        base_factors = params["traffic_base_factors"]
+        self.levels = np.array([traffic_levels.index(level) for level in zone_levels], dtype=np.int8)
+        base = np.array([base_factors[level] for level in traffic_levels])[self.levels]
+        self.factors = base[:, None, None] * congestion_curves(params)[None, :, :]
+
+    def lookup(self, zones, scenario_type, hours):
+        """Factors for (zone, hour) pairs under one day type; arrays broadcast"""
+        return self.factors[zones, self.scenarios.scenario_id(scenario_type), hours]
+
+    def order_factors(self, zone, scenario_type, orders):
+        """Traffic factor for each order of one zone from its arrival hour"""
+        hours = np.fromiter((o.timestamp.hour for o in orders), dtype=np.int64, count=len(orders))
+        return self.lookup(zone, scenario_type, hours)
+
+def arrival_minutes(count, time_slot, rng):
+    """Sorted arrival minute of day for count orders, uniform over the slot (or whole day)"""
+    start, end = slot_hours.get(time_slot, (0, hours_per_day))
+    return np.sort(rng.integers(start * 60, end * 60, size=count))
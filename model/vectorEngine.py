@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from definitions import Order
+from parameters import default_parameters
+from streams import stream_for
+from catalog import numpy_rng
+from traffic import arrival_minutes
+from scenarios import resolve_scenario
+from kernels import dispatch_intraday
+from geometry import travel_delivery_times
+from model import build_baskets
+import metrics
+
+# Array versions of generate_orders / assign_riders. Every per-customer and
+# per-order draw of the reference engine becomes one numpy draw per zone, so
+# results match the reference in distribution, not draw for draw.
+
+def generate_orders(customers, scenario_type, time_slot, volume_multiplier, params=None, streams=None):
+    """Vectorized generate_orders: same decision rules, drawn for the whole zone at once"""
+    params = params or default_parameters
+    if not customers:
+        return []
+    scenario = resolve_scenario(scenario_type, time_slot, params)
+    zone_name = customers[0].zone
+    rng = numpy_rng(stream_for(streams, "orders", zone_name))
+    probability = min(scenario.base_probability * volume_multiplier, params["max_order_probability"])
+
+    # should_generate_order for every customer
+    count = len(customers)
+    has_wallet = np.fromiter((c.has_wallet for c in customers), dtype=bool, count=count)
+    accepted = rng.random(count) < scenario.order_acceptance
+    if scenario.wallet_always_orders:
+        accepted |= has_wallet
+    ordering = np.flatnonzero((rng.random(count) <= probability) & accepted)
+
+    # plan_order_items and is_order_scheduled for every order
+    num_orders = len(ordering)
+    wishlist_sizes = customers[0].wishlists.lengths()[ordering]
+    from_wishlist = (wishlist_sizes > 0) & (rng.random(num_orders) < scenario.wishlist_probability)
+    low, high = scenario.wishlist_items
+    wishlist_counts = np.where(from_wishlist, np.minimum(wishlist_sizes, rng.integers(low, high + 1, num_orders)), 0)
+    low, high = scenario.catalog_items
+    catalog_counts = np.where(from_wishlist, 0, rng.integers(low, high + 1, num_orders))
+    scheduled = (rng.random(num_orders) < scenario.scheduled_probability).tolist()
+
+    if num_orders == 0:
+        return []
+    baskets = build_baskets(customers[0].wishlists, ordering, wishlist_counts, catalog_counts,
+                            params, stream_for(streams, "catalog", zone_name))
+    day_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    minutes = arrival_minutes(num_orders, time_slot, numpy_rng(stream_for(streams, "arrival", zone_name)))
+    return [
+        Order(customer=customers[row], scheduled=scheduled[i],
+              timestamp=day_start + timedelta(minutes=minute), basket=baskets, index=i)
+        for i, (row, minute) in enumerate(zip(ordering.tolist(), minutes.tolist()))
+    ]
+
+def delivery_times(scenario, traffic_factors, base_delivery_time, rng):
+    """Vectorized calculate_delivery_time for an array of traffic factors"""
+    count = len(traffic_factors)
+    base_time = (base_delivery_time + rng.integers(-2, 4, count)) * scenario.delivery_multiplier
+    final_time = (base_time * traffic_factors).astype(np.int64) + rng.integers(-1, 4, count)
+    return np.maximum(final_time, 5)
+
+def assign_riders(zone, scenario_type, time_slot, traffic_factors, base_delivery_time, params=None, streams=None):
+    """Vectorized assign_riders
+
+    With every rider starting the day empty, least-loaded assignment with
+    ties to the first rider is plain round robin until all riders hit the
+    cap, so the rider of each order is a modulo instead of a loop.
+    """
+    params = params or default_parameters
+    scenario = resolve_scenario(scenario_type, time_slot, params)
+    max_orders_per_rider = params["max_orders_per_rider"]
+    orders = zone.orders
+    num_riders = len(zone.riders)
+    rng = numpy_rng(stream_for(streams, "delivery", zone.name))
+    traffic_factors = np.asarray(traffic_factors, dtype=float)
+    travel_times = None
+    if params["delivery_model"] != "jitter":
+        travel_times = travel_delivery_times(scenario, traffic_factors, zone.order_travel_minutes, params)
+
+    if params["intraday_dispatch"]:
+        if travel_times is None:
+            trips = delivery_times(scenario, traffic_factors, base_delivery_time, rng)
+        else:
+            trips = travel_times
+        arrivals = np.fromiter((o.timestamp.hour * 60 + o.timestamp.minute for o in orders),
+                               dtype=np.int64, count=len(orders))
+        loads = np.zeros(num_riders, dtype=np.int64)
+        rider_of_order, pickups = dispatch_intraday(
+            arrivals, trips, np.zeros(num_riders, dtype=np.int64), loads, max_orders_per_rider, params["use_jit"]
+        )
+        minutes = pickups - arrivals + trips
+        scanned = num_riders
+    else:
+        assigned = min(len(orders), num_riders * max_orders_per_rider)
+        rider_of_order = np.full(len(orders), -1, dtype=np.int64)
+        rider_of_order[:assigned] = np.arange(assigned) % max(num_riders, 1)
+        loads = np.bincount(rider_of_order[:assigned], minlength=num_riders)
+        minutes = np.zeros(len(orders), dtype=np.int64)
+        if travel_times is None:
+            minutes[:assigned] = delivery_times(scenario, traffic_factors[:assigned], base_delivery_time, rng)
+        else:
+            minutes[:assigned] = travel_times[:assigned]
+        scanned = 1  # The modulo picks the rider directly
+
+    unassigned_orders = []
+    rider_ids = [rider.id for rider in zone.riders]
+    for order, r, delivery_minutes in zip(orders, rider_of_order.tolist(), minutes.tolist()):
+        if r >= 0:
+            order.delivery_time = order.timestamp + timedelta(minutes=delivery_minutes)
+            order.delivery_minutes = delivery_minutes
+            order.assigned_rider = rider_ids[r]
+        else:
+            unassigned_orders.append(order)
+            order.delivery_time = None
+            order.delivery_minutes = None
+            order.assigned_rider = None
+
+    metrics.riders_scanned.observe(scanned, len(orders) - len(unassigned_orders))
+    for rider, load in zip(zone.riders, loads.tolist()):
+        rider.orders_delivered = load
+        rider.available = load < max_orders_per_rider
+    zone.unassigned_orders = unassigned_orders
@@ -0,0 +1,130 @@
+import calendar
+import random
+from datetime import date, timedelta
+from multiprocessing import Pool
+
+import pandas as pd
+
+from parameters import resolve_parameters
+from interaction import run_simulation, summarize_city_results
+from tracing import span, pool_options
+
+# Scenario labels used by print_yearly_analysis
+day_type_labels = {
+    "bau": "BAU",
+    "peak_days": "Peak Days",
+    "event_sale": "Sale Days",
+    "peak_hour_event": "Big Event Day"
+}
+
+peak_weekdays = [4, 5, 6]  # Fri, Sat, Sun
+
+def default_sale_days(year):
+    """One sale day per month (the 15th)"""
+    return [date(year, month, 15) for month in range(1, 13)]
+
+def default_big_event_day(year):
+    """The big sale event opens on 1 October"""
+    return date(year, 10, 1)
+
+def build_calendar(year, sale_days=None, big_event_day=None):
+    """Assign a scenario to every date of the year
+
+    Priority: big event > sale day > Fri-Sun peak day > BAU.
+    """
+    sale_days = set(sale_days if sale_days is not None else default_sale_days(year))
+    big_event_day = big_event_day or default_big_event_day(year)
+    days = []
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day == big_event_day:
+            scenario_type = "peak_hour_event"
+        elif day in sale_days:
+            scenario_type = "event_sale"
+        elif day.weekday() in peak_weekdays:
+            scenario_type = "peak_days"
+        else:
+            scenario_type = "bau"
+        days.append((day, scenario_type))
+        day += timedelta(days=1)
+    return days
+
+def calendar_breakdown(days):
+    """Day counts per scenario, the calendar counterpart of get_yearly_breakdown"""
+    counts = {scenario_type: 0 for scenario_type in day_type_labels}
+    for _, scenario_type in days:
+        counts[scenario_type] += 1
+    return counts
+
+def day_seed(seed, city_name, day):
+    """Independent, reproducible seed for one city-day"""
+    return f"{seed}:{city_name}:{day.isoformat()}"
+
+def _simulate_month(task):
+    """Simulate every day of one city-month in this worker; returns daily KPI records"""
+    city_name, days, seed, overrides = task
+    params = resolve_parameters(overrides)
+    records = []
+    for day, scenario_type in days:
+        random.seed(day_seed(seed, city_name, day))
+        with span(day.isoformat(), "day", city=city_name):
+            summary = summarize_city_results(run_simulation(city_name, scenario_type, params=params))
+        records.append({
+            "city": city_name,
+            "date": day,
+            "month": day.month,
+            "weekday": calendar.day_abbr[day.weekday()],
+            "scenario": scenario_type,
+            "day_type": day_type_labels[scenario_type],
+            **summary
+        })
+    return records
+
+def simulate_calendar_year(cities, year, seed=0, sale_days=None, big_event_day=None,
+                           overrides=None, workers=None):
+    """Simulate all days of the year for each city, one city-month per task
+
+    Months run in parallel on a process pool and their daily records are
+    streamed back as each month finishes. Returns one row per city-day.
+    """
+    days = build_calendar(year, sale_days, big_event_day)
+    tasks = []
+    for city_name in cities:
+        for month in range(1, 13):
+            month_days = [(day, scenario_type) for day, scenario_type in days if day.month == month]
+            tasks.append((city_name, month_days, seed, overrides or {}))
+
+    records = []
+    with Pool(processes=workers, **pool_options()) as pool:
+        for month_records in pool.imap_unordered(_simulate_month, tasks):
+            records.extend(month_records)
+
+    daily = pd.DataFrame(records)
+    return daily.sort_values(["city", "date"]).reset_index(drop=True)
+
+def yearly_report(daily):
+    """Aggregate daily records into per city and day type totals with day-to-day spread"""
+    grouped = daily.groupby(["city", "day_type"])
+    report = pd.DataFrame({
+        "Days": grouped.size(),
+        "Total Orders": grouped["Total Orders"].sum(),
+        "Avg Orders/Day": grouped["Total Orders"].mean(),
+        "Std Orders/Day": grouped["Total Orders"].std(ddof=1).fillna(0),
+        "Unassigned Orders": grouped["Unassigned Orders"].sum(),
+        "Assignment Rate": grouped["Assigned Orders"].sum() / grouped["Total Orders"].sum() * 100,
+        "Avg SLA <10": grouped["SLA <10 mins"].mean(),
+        "Avg OPH": grouped["Avg OPH"].mean(),
+        "Avg Util%": grouped["Rider Utilization"].mean(),
+        "Avg Cost": grouped["Cost/Delivery"].mean()
+    })
+    return report
+
+def monthly_report(daily):
+    """Per city and month totals"""
+    grouped = daily.groupby(["city", "month"])
+    return pd.DataFrame({
+        "Total Orders": grouped["Total Orders"].sum(),
+        "Unassigned Orders": grouped["Unassigned Orders"].sum(),
+        "Assignment Rate": grouped["Assigned Orders"].sum() / grouped["Total Orders"].sum() * 100,
+        "Peak Daily Orders": grouped["Total Orders"].max()
+    })
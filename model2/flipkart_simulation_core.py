@@ -1,36 +1,16 @@
 
 import math
+import os
+import sys
 
-city_metadata = {
-    "Delhi": {
-        "area_sq_km": 141,
-        "fixed_riders": 75,
-        "dark_stores": 16,
-        "traffic_factor": 5,
-        "BAU_order_per_hour_non_peak": 868,
-        "peakday_order_per_hour_non_peak": 1085,
-        "monthpeak_order_per_hour_non_peak": 1229,
-        "yearpeak_order_per_hour_non_peak": 2604,
-        "BAU_order_per_hour_peak": 940,
-        "peakday_order_per_hour_peak": 1157,
-        "monthpeak_order_per_hour_peak": 1374,
-        "yearpeak_order_per_hour_peak": 2821
-    },
-    "Pune": {
-        "area_sq_km": 10,
-        "fixed_riders": 30,
-        "dark_stores": 2,
-        "traffic_factor": 3,
-        "BAU_order_per_hour_non_peak": 416,
-        "peakday_order_per_hour_non_peak": 520,
-        "monthpeak_order_per_hour_non_peak": 590,
-        "yearpeak_order_per_hour_non_peak": 1250,
-        "BAU_order_per_hour_peak": 451,
-        "peakday_order_per_hour_peak": 555,
-        "monthpeak_order_per_hour_peak": 659,
-        "yearpeak_order_per_hour_peak": 1354
-    }
-}
+# The city registry lives in model/ (model/cities.csv by default)
+model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model")
+if model_dir not in sys.path:
+    sys.path.append(model_dir)
+
+from cityProfiles import load_city_registry, model2_city_metadata
+
+city_metadata = model2_city_metadata(load_city_registry())
 
 options_map = {
     "a": "BAU",
@@ -3,43 +3,30 @@ import time
 import pandas as pd
 from datetime import datetime
 import os
+import sys
+import argparse
+from contextlib import contextmanager
+from multiprocessing import Pool
+from types import SimpleNamespace
+
+# The city registry and tracing live in model/
+model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model")
+if model_dir not in sys.path:
+    sys.path.append(model_dir)
+
+from cityProfiles import load_city_registry, model2_city_metadata
+from tracing import span, pool_options
 
 # Meta Data
 max_orders_per_day = 32
+orders_per_fixed_rider = 2  # Orders a fixed rider completes per hour
 dark_store_radius_km = 3
 dark_store_area = math.pi * (dark_store_radius_km ** 2)
 base_delivery_time = 10
 
-city_metadata = {
-    "Delhi": {
-        "area_sq_km": 141,
-        "fixed_riders": 75,
-        "dark_stores": 16,
-        "traffic_factor": 5,
-        "BAU_order_per_hour_non_peak": 868,
-        "peakday_order_per_hour_non_peak": 1085,
-        "monthpeak_order_per_hour_non_peak": 1229,
-        "yearpeak_order_per_hour_non_peak": 2604,
-        "BAU_order_per_hour_peak": 940,
-        "peakday_order_per_hour_peak": 1157,
-        "monthpeak_order_per_hour_peak": 1374,
-        "yearpeak_order_per_hour_peak": 2821
-    },
-    "Pune": {
-        "area_sq_km": 10,
-        "fixed_riders": 30,
-        "dark_stores": 2,
-        "traffic_factor": 3,
-        "BAU_order_per_hour_non_peak": 416,
-        "peakday_order_per_hour_non_peak": 520,
-        "monthpeak_order_per_hour_non_peak": 590,
-        "yearpeak_order_per_hour_non_peak": 1250,
-        "BAU_order_per_hour_peak": 451,
-        "peakday_order_per_hour_peak": 555,
-        "monthpeak_order_per_hour_peak": 659,
-        "yearpeak_order_per_hour_peak": 1354
-    }
-}
+# City profiles (fleet, dark stores, traffic, hourly order rates) come from
+# the registry shared with model/ (model/cities.csv by default)
+city_metadata = model2_city_metadata(load_city_registry())
 
 # Constants for simulation
 hours_per_day = 16
@@ -54,11 +41,62 @@ options_map = {
     "d": "yearpeak",
     "e": "all"
 }
+scenario_names = {option: name for option, name in options_map.items() if option != "e"}
+
+def write_results(results, path, output_format=None):
+    """Hourly result rows to CSV, Parquet or JSON (default: from the extension)"""
+    output_format = output_format or os.path.splitext(path)[1].lstrip(".").lower() or "csv"
+    df = pd.DataFrame(results)
+    if output_format == "csv":
+        df.to_csv(path, index=False)
+    elif output_format == "parquet":
+        df.to_parquet(path, index=False)
+    elif output_format == "json":
+        df.to_json(path, orient="records", indent=1)
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+class ConsoleRenderer:
+    """Prints every line as it is produced"""
+
+    def line(self, text=""):
+        print(text)
+
+    def close(self):
+        pass
+
+class BufferedRenderer:
+    """Keeps the report in memory and writes it in one go on close (nowhere without a stream)
+
+    Printing one hour row at a time dominates runtime across hundreds of cities.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.lines = []
+
+    def line(self, text=""):
+        self.lines.append(text)
+
+    def getvalue(self):
+        return "\n".join(self.lines) + "\n" if self.lines else ""
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.write(self.getvalue())
+            self.stream.flush()
 
 class FlipkartRiderSimulation:
-    def __init__(self, city_metadata):
+    def __init__(self, city_metadata, orders_per_fixed_rider=orders_per_fixed_rider,
+                 max_orders_per_day=max_orders_per_day, hour_delay=0.05, renderer=None):
         self.city_metadata = city_metadata
         self.simulation_results = []
+        self.profile = None
+        self.hour_delay = hour_delay  # Seconds between hour rows (demo pacing; 0 for batch runs)
+        self.renderer = renderer or ConsoleRenderer()
+        self.render = self.renderer.line
+        # A fixed rider can't exceed the daily cap spread across the operating hours
+        self.fixed_rider_hourly_capacity = min(orders_per_fixed_rider, max_orders_per_day / hours_per_day)
         
     def clear_screen(self):
         """Clear console for better display"""
@@ -66,25 +104,26 @@ class FlipkartRiderSimulation:
     
     def print_header(self, option_type):
         """Print formatted header for simulation"""
-        print("=" * 100)
-        print(f"🚀 FLIPKART QUICK COMMERCE - RIDER OPTIMIZATION SIMULATION")
-        print(f"📊 Simulation Type: {options_map.get(option_type, option_type).upper()}")
-        print(f"🕒 Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 100)
+        self.render("=" * 100)
+        self.render(f"🚀 FLIPKART QUICK COMMERCE - RIDER OPTIMIZATION SIMULATION")
+        self.render(f"📊 Simulation Type: {options_map.get(option_type, option_type).upper()}")
+        self.render(f"🕒 Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.render("=" * 100)
     
     def print_city_header(self, city):
         """Print city-specific header"""
         city_data = self.city_metadata[city]
-        print(f"\n📍 CITY: {city.upper()}")
-        print(f"   Fixed Riders: {city_data['fixed_riders']} | Dark Stores: {city_data['dark_stores']} | Traffic Factor: {city_data['traffic_factor']}")
-        print("-" * 100)
-        print(f"{'Hour':<4} | {'Period':<10} | {'Orders':<7} | {'Fixed Used':<11} | {'Adhoc Used':<11} | {'OPH':<6} | {'Fixed Util %':<12}")
-        print("-" * 100)
+        self.render(f"\n📍 CITY: {city.upper()}")
+        self.render(f"   Fixed Riders: {city_data['fixed_riders']} | Dark Stores: {city_data['dark_stores']} | Traffic Factor: {city_data['traffic_factor']}")
+        self.render("-" * 100)
+        self.render(f"{'Hour':<4} | {'Period':<10} | {'Orders':<7} | {'Fixed Used':<11} | {'Adhoc Used':<11} | {'OPH':<6} | {'Fixed Util %':<12}")
+        self.render("-" * 100)
     
     def calculate_metrics(self, orders, city_data):
         """Calculate rider metrics based on algorithm"""
-        fixed_riders_used = min(orders // 2, city_data["fixed_riders"])
-        adhoc_riders_used = max(0, orders - (fixed_riders_used * 2))
+        capacity = self.fixed_rider_hourly_capacity
+        fixed_riders_used = min(int(orders // capacity), city_data["fixed_riders"])
+        adhoc_riders_used = max(0, math.ceil(orders - (fixed_riders_used * capacity)))
         total_riders = fixed_riders_used + adhoc_riders_used
         
         OPH = orders / total_riders if total_riders > 0 else 0
@@ -98,77 +137,84 @@ class FlipkartRiderSimulation:
             'fixed_utilization': fixed_utilization
         }
     
+    def hourly_metrics(self, scenario_name, city):
+        """Yield (hour, period, orders, metrics) for one city and scenario without any display"""
+        city_data = self.city_metadata[city]
+        for hour in range(1, hours_per_day + 1):
+            # Determine if peak or non-peak hour
+            if hour <= peak_hours:
+                period = "PEAK"
+                order_key = f"{scenario_name}_order_per_hour_peak"
+            else:
+                period = "NON-PEAK"
+                order_key = f"{scenario_name}_order_per_hour_non_peak"
+            
+            orders = city_data[order_key]
+            yield hour, period, orders, self.calculate_metrics(orders, city_data)
+    
     def simulate_single_scenario(self, option):
         """Simulate a single scenario (BAU, peakday, etc.)"""
-        scenario_name = options_map[option]
-        self.print_header(option)
+        scenario_name = scenario_names.get(option, option)
+        if scenario_name not in scenario_names.values():
+            raise ValueError(f"Unknown scenario: {option}")
+        with self._phase("rendering", items=1):
+            self.print_header(option)
         
         all_city_results = {}
         
         for city in self.city_metadata:
-            city_data = self.city_metadata[city]
-            self.print_city_header(city)
-            
-            hourly_metrics = []
-            
-            for hour in range(1, hours_per_day + 1):
-                # Determine if peak or non-peak hour
-                if hour <= peak_hours:
-                    period = "PEAK"
-                    order_key = f"{scenario_name}_order_per_hour_peak"
-                else:
-                    period = "NON-PEAK"
-                    order_key = f"{scenario_name}_order_per_hour_non_peak"
-                
-                orders = city_data[order_key]
-                metrics = self.calculate_metrics(orders, city_data)
+            with span(f"{city} {scenario_name}", "city", city=city, scenario=scenario_name):
+                # Fixed rider assignment and ad-hoc top-up for every hour
+                with self._phase("rider assignment", items=hours_per_day):
+                    hourly = list(self.hourly_metrics(scenario_name, city))
                 
-                # Display real-time data
-                print(f"{hour:<4} | {period:<10} | {orders:<7} | {metrics['fixed_riders_used']:<11} | "
-                      f"{metrics['adhoc_riders_used']:<11} | {metrics['OPH']:<6.2f} | {metrics['fixed_utilization']:<12.2f}")
+                # Detailed rows and city averages
+                with self._phase("city summary", items=len(hourly)):
+                    for hour, period, orders, metrics in hourly:
+                        self.simulation_results.append({
+                            'scenario': scenario_name,
+                            'city': city,
+                            'hour': hour,
+                            'period': period,
+                            'orders': orders,
+                            **metrics
+                        })
+                    avg_OPH = sum(m['OPH'] for *_, m in hourly) / len(hourly)
+                    avg_fixed_util = sum(m['fixed_utilization'] for *_, m in hourly) / len(hourly)
+                    all_city_results[city] = {
+                        'avg_OPH': avg_OPH,
+                        'avg_fixed_util': avg_fixed_util
+                    }
                 
-                # Store for averaging
-                hourly_metrics.append(metrics)
-                
-                # Store detailed results
-                self.simulation_results.append({
-                    'scenario': scenario_name,
-                    'city': city,
-                    'hour': hour,
-                    'period': period,
-                    'orders': orders,
-                    **metrics
-                })
-                
-                # Simulation delay (can be removed for faster execution)
-                time.sleep(0.05)  # Reduced for competition demo
-            
-            # Calculate and display city averages
-            avg_OPH = sum(m['OPH'] for m in hourly_metrics) / len(hourly_metrics)
-            avg_fixed_util = sum(m['fixed_utilization'] for m in hourly_metrics) / len(hourly_metrics)
+                with self._phase("rendering", items=len(hourly)):
+                    self.print_city_header(city)
+                    for hour, period, orders, metrics in hourly:
+                        # Display real-time data
+                        self.render(f"{hour:<4} | {period:<10} | {orders:<7} | {metrics['fixed_riders_used']:<11} | "
+                                    f"{metrics['adhoc_riders_used']:<11} | {metrics['OPH']:<6.2f} | {metrics['fixed_utilization']:<12.2f}")
+                        
+                        # Simulation delay (hour_delay=0 removes it); profiled runs skip
+                        # it so the phase timings measure the simulation, not the pacing
+                        if self.hour_delay and self.profile is None:
+                            time.sleep(self.hour_delay)
+                    
+                    self.render("-" * 100)
+                    self.render(f"📈 CITY SUMMARY - {city}")
+                    self.render(f"   Average OPH: {avg_OPH:.2f} | Average Fixed Utilization: {avg_fixed_util:.2f}%")
+                    self.render("-" * 100)
             
-            all_city_results[city] = {
-                'avg_OPH': avg_OPH,
-                'avg_fixed_util': avg_fixed_util
-            }
-            
-            print("-" * 100)
-            print(f"📈 CITY SUMMARY - {city}")
-            print(f"   Average OPH: {avg_OPH:.2f} | Average Fixed Utilization: {avg_fixed_util:.2f}%")
-            print("-" * 100)
-        
         return all_city_results
     
     def simulate_all_scenarios(self):
         """Simulate all scenarios for grand average"""
-        print("🔄 RUNNING ALL SCENARIOS SIMULATION")
-        print("=" * 100)
+        self.render("🔄 RUNNING ALL SCENARIOS SIMULATION")
+        self.render("=" * 100)
         
         all_results = {}
         grand_totals = {"total_OPH": 0, "total_fixed_util": 0, "count": 0}
         
         for opt in ["a", "b", "c", "d"]:
-            print(f"\n🎯 Processing {options_map[opt].upper()} Scenario...")
+            self.render(f"\n🎯 Processing {options_map[opt].upper()} Scenario...")
             results = self.simulate_single_scenario(opt)
             all_results[opt] = results
             
@@ -179,43 +225,63 @@ class FlipkartRiderSimulation:
                 grand_totals["count"] += 1
         
         # Calculate and display grand averages
-        print("\n" + "=" * 100)
-        print("🏆 GRAND SUMMARY - ALL SCENARIOS & CITIES")
-        print("=" * 100)
+        self.render("\n" + "=" * 100)
+        self.render("🏆 GRAND SUMMARY - ALL SCENARIOS & CITIES")
+        self.render("=" * 100)
         
         if grand_totals["count"] > 0:
             grand_avg_OPH = grand_totals["total_OPH"] / grand_totals["count"]
             grand_avg_fixed_util = grand_totals["total_fixed_util"] / grand_totals["count"]
             
-            print(f"📊 Grand Average OPH: {grand_avg_OPH:.2f}")
-            print(f"📊 Grand Average Fixed Utilization: {grand_avg_fixed_util:.2f}%")
+            self.render(f"📊 Grand Average OPH: {grand_avg_OPH:.2f}")
+            self.render(f"📊 Grand Average Fixed Utilization: {grand_avg_fixed_util:.2f}%")
         
         return all_results
     
     def export_results_to_csv(self):
         """Export detailed results to CSV for further analysis"""
         if self.simulation_results:
-            df = pd.DataFrame(self.simulation_results)
             filename = f"flipkart_rider_simulation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            df.to_csv(filename, index=False)
-            print(f"\n💾 Results exported to: {filename}")
-            return filename
+            return self.export_results(filename)
         return None
     
-    def run_simulation(self, option="a"):
-        """Main simulation runner"""
+    def export_results(self, path, output_format=None):
+        """Write the hourly results to path as CSV, Parquet or JSON (default: from the extension)"""
+        write_results(self.simulation_results, path, output_format)
+        self.render(f"\n💾 Results exported to: {path}")
+        return path
+    
+    def run_simulation(self, option="a", profile=None):
+        """Main simulation runner
+
+        profile: optional model/instrumentation.py RunProfile (anything with a
+        phase(name, items) context manager); kept on self.profile afterwards.
+        Profiled runs skip the hour_delay pacing.
+        """
         self.simulation_results = []  # Reset results
+        self.profile = profile
         
+        # Per city and scenario: "rider assignment", "city summary" and "rendering" phases
         if option == "e":
             results = self.simulate_all_scenarios()
         else:
             results = self.simulate_single_scenario(option)
         
         # Export results
-        csv_file = self.export_results_to_csv()
+        with self._phase("export", items=len(self.simulation_results)):
+            csv_file = self.export_results_to_csv()
         
         return results, csv_file
 
+    @contextmanager
+    def _phase(self, name, items=None):
+        if self.profile is None:
+            with span(name):
+                yield SimpleNamespace(items=items)
+        else:
+            with self.profile.phase(name, items) as record:
+                yield record
+
 # Interactive Menu System
 def display_menu():
     print("\n" + "=" * 60)
@@ -265,6 +331,92 @@ def print_kpi_summary():
     print("4. Peak vs Non-Peak Analysis: Resource allocation optimization")
     print("=" * 80)
 
+def _simulate_city(task):
+    """One city's scenarios in a worker: hourly rows plus the rendered report text"""
+    city, city_data, options = task
+    renderer = BufferedRenderer()
+    sim = FlipkartRiderSimulation({city: city_data}, hour_delay=0, renderer=renderer)
+    for option in options:
+        sim.simulate_single_scenario(option)
+    return sim.simulation_results, renderer.getvalue()
+
+def _finished_cities(tasks, workers):
+    if workers == 1 or len(tasks) == 1:
+        yield from map(_simulate_city, tasks)
+    else:
+        with Pool(processes=workers, **pool_options()) as pool:
+            yield from pool.imap(_simulate_city, tasks)
+
+def national_rollup(results):
+    """Every city's hourly rows summed into one row per scenario and hour"""
+    df = pd.DataFrame(results)
+    rollup = df.groupby(["scenario", "hour", "period"], sort=False)[
+        ["orders", "fixed_riders_used", "adhoc_riders_used", "total_riders"]
+    ].sum()
+    rollup.insert(0, "cities", df.groupby(["scenario", "hour", "period"], sort=False).size())
+    rollup["OPH"] = rollup["orders"] / rollup["total_riders"].where(rollup["total_riders"] > 0)
+    return rollup.fillna({"OPH": 0})
+
+def batch_main(argv=None):
+    """Headless entry point: no menu, no pacing delay, results written to --output
+
+    Cities run in parallel (one task per city); each city's report is
+    rendered in its worker and written in one piece.
+    """
+    parser = argparse.ArgumentParser(description="Run model2 scenarios without the interactive menu")
+    parser.add_argument("--scenarios", nargs="+", default=["e"],
+                        help="option letters a-e or scenario names (BAU, peakday, monthpeak, yearpeak), "
+                             "space- or comma-separated")
+    parser.add_argument("--cities", nargs="+", help="cities to include (default: all)")
+    parser.add_argument("--city-registry", help="CSV or JSON city registry (default: model/cities.csv)")
+    parser.add_argument("--workers", type=int, help="worker processes (1 runs in this process)")
+    parser.add_argument("--output", required=True, help="results file (.csv, .parquet or .json)")
+    parser.add_argument("--format", choices=["csv", "parquet", "json"], help="default: from the extension")
+    parser.add_argument("--rollup", help="also write the national rollup per scenario and hour (.csv or .parquet)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="buffer the report instead of printing each row (written to --report if given)")
+    parser.add_argument("--report", help="write the buffered report to this file (implies --quiet)")
+    args = parser.parse_args(argv)
+
+    metadata = model2_city_metadata(load_city_registry(args.city_registry)) if args.city_registry else city_metadata
+    cities = args.cities or list(metadata)
+    unknown = [city for city in cities if city not in metadata]
+    if unknown:
+        parser.error(f"unknown cities: {', '.join(unknown)}")
+    options = []
+    for scenario in ",".join(args.scenarios).split(","):
+        options.extend(["a", "b", "c", "d"] if scenario in ("e", "all") else [scenario])
+    invalid = [o for o in options if o not in scenario_names and o not in scenario_names.values()]
+    if invalid:
+        parser.error(f"unknown scenarios: {', '.join(invalid)}")
+    # Each scenario once, however it was named ("a a", "a e", "a BAU"), in first-mention order
+    options = list(dict.fromkeys(scenario_names.get(o, o) for o in options))
+
+    tasks = [(city, metadata[city], options) for city in cities]
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+    renderer = BufferedRenderer(report) if args.quiet or report is not None else ConsoleRenderer()
+    results = []
+    try:
+        for rows, text in _finished_cities(tasks, args.workers):
+            results.extend(rows)
+            renderer.line(text.rstrip("\n"))
+    finally:
+        renderer.close()
+        if report is not None:
+            report.close()
+
+    write_results(results, args.output, args.format)
+    if args.rollup:
+        rollup = national_rollup(results)
+        if args.rollup.endswith(".parquet"):
+            rollup.to_parquet(args.rollup)
+        else:
+            rollup.to_csv(args.rollup)
+    return results
+
 if __name__ == "__main__":
-    print_kpi_summary()
-    main()
+    if len(sys.argv) > 1:
+        batch_main()
+    else:
+        print_kpi_summary()
+        main()